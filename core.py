@@ -0,0 +1,1170 @@
+"""
+Shared building blocks for Project Command: configuration, Carbon CSS, secret
+handling, SQLite storage, the DeepSeek AI engine and small UI helpers.
+Page modules live in views/; main.py is the Streamlit entrypoint and router.
+"""
+
+# ─────────────────────────────────────────────────────────────────────────────
+import atexit, base64, functools, hashlib, io, itertools, json, os, queue, re, secrets, sqlite3, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from pathlib import Path
+from threading import Lock, Thread, local
+from types import MappingProxyType, SimpleNamespace
+from typing import Optional
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from urllib3.util.retry import Retry
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+    CRYPTO_AVAILABLE = True
+except ImportError:
+    CRYPTO_AVAILABLE = False
+
+# JSON columns, SSE chunks and prompt context: orjson when installed, stdlib
+# otherwise. The fallback writes the same compact, unescaped-UTF-8 form, so prompt
+# text reads the same either way (and non-ASCII costs one char, not six). Cache
+# keys keep stdlib json for sort_keys / default=str.
+try:
+    import orjson
+    json_loads = orjson.loads
+    def json_dumps(obj): return orjson.dumps(obj).decode()
+except ImportError:
+    json_loads = json.loads
+    def json_dumps(obj): return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+# Lists and dicts bound as query parameters are stored as JSON text, so writers
+# pass skills / blockers / retro_notes / features as plain Python objects.
+sqlite3.register_adapter(list, json_dumps)
+sqlite3.register_adapter(dict, json_dumps)
+
+# ═════════════════════════════════════════════════════════════════════════════
+# CONFIGURATION
+# ═════════════════════════════════════════════════════════════════════════════
+APP_TITLE      = "Project Command"
+APP_VERSION    = "3.0.0"
+DB_PATH        = Path(os.getenv("DATABASE_PATH", "project_command.db"))
+SECRET_KEY     = os.getenv("APP_SECRET_KEY", "dev-secret-key-change-in-production-32c")
+DEEPSEEK_URL   = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
+MONTHLY_BUDGET = float(os.getenv("AI_MONTHLY_BUDGET_USD", "50.0"))
+MAX_TOKENS     = int(os.getenv("AI_MAX_TOKENS", "1200"))
+RATE_LIMIT_RPM = int(os.getenv("AI_RATE_LIMIT_RPM", "20"))
+AI_TIMEOUT     = int(os.getenv("AI_TIMEOUT_SECONDS", "30"))
+AI_CACHE_TTL   = int(os.getenv("AI_CACHE_TTL_SECONDS", "3600"))
+# Features switched on by a quick activation (sidebar or in-page gate).
+AI_FEATURES    = ("therapy", "simulator", "insights", "retro", "risk", "forecast")
+
+PRICING = MappingProxyType({
+    "deepseek-chat":  {"in": 0.14, "out": 0.28},
+    "deepseek-coder": {"in": 0.14, "out": 0.28},
+})
+# USD per token as (prompt, completion), so _ai_cost is two multiplies.
+_PRICE_PER_TOKEN = MappingProxyType({m: (p["in"]/1e6, p["out"]/1e6) for m, p in PRICING.items()})
+_DEFAULT_PRICE   = (0.14/1e6, 0.28/1e6)
+
+SYSTEM_PROMPTS = MappingProxyType({
+    "therapy":    "You are a senior project management consultant. Provide structured, evidence-based analysis. Use bullet points. Max 300 words.",
+    "simulator":  "You are a quantitative risk and schedule simulator. Provide probabilistic forecasts with ranges. Max 300 words.",
+    "insights":   "You are a cross-project portfolio analyst. Identify patterns and transferable lessons. Be precise. Max 300 words.",
+    "retro":      "You are an agile coach facilitating a sprint retrospective. Structure as: Went Well / Improve / Action Items. Max 300 words.",
+    "risk":       "You are a project risk analyst. Rate risks by probability and impact. Format as a structured list. Max 300 words.",
+    "forecast":   "You are a sprint velocity forecasting expert. Provide data-driven delivery date estimates with confidence intervals. Max 300 words.",
+    "general":    "You are a professional project management assistant. Be concise and actionable. Max 300 words.",
+})
+# Ready-made system message per feature: requests only serialize it, never mutate it.
+_SYSTEM_MESSAGES = MappingProxyType({f: {"role":"system","content":p} for f, p in SYSTEM_PROMPTS.items()})
+
+# IBM Carbon colours
+C_BG        = "#161616"
+C_LAYER     = "#262626"
+C_LAYER2    = "#393939"
+C_BORDER    = "#525252"
+C_BLUE      = "#0f62fe"
+C_CYAN      = "#0043ce"
+C_TEXT      = "#f4f4f4"
+C_TEXT_SEC  = "#a8a8a8"
+C_GREEN     = "#24a148"
+C_YELLOW    = "#f1c21b"
+C_RED       = "#da1e28"
+C_ORANGE    = "#ff832b"
+
+# ═════════════════════════════════════════════════════════════════════════════
+# IBM CARBON CSS INJECTION
+# ═════════════════════════════════════════════════════════════════════════════
+# Stylesheet lives in carbon.css; it is read and minified once at import. It is
+# still emitted on every run: Streamlit drops any element a rerun does not
+# re-emit, so a once-per-session guard would strip the theme after the first
+# interaction.
+def _minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)   # comments
+    css = re.sub(r"\s+", " ", css)                      # whitespace runs
+    css = re.sub(r"\s*([{};,])\s*", r"\1", css)        # around punctuation
+    return css.replace(": ", ":").replace(";}", "}").strip()
+
+_CSS_HTML = "<style>" + _minify_css((Path(__file__).parent / "carbon.css").read_text(encoding="utf-8")) + "</style>"
+
+def inject_css():
+    st.markdown(_CSS_HTML, unsafe_allow_html=True)
+
+# ═════════════════════════════════════════════════════════════════════════════
+# SECURITY
+# ═════════════════════════════════════════════════════════════════════════════
+def _fernet_key() -> bytes:
+    digest = hashlib.sha256(SECRET_KEY.encode()).digest()
+    return base64.urlsafe_b64encode(digest)
+
+# One stateless Fernet per process: get_ai_config decrypts the key on every rerun,
+# so the key derivation and cipher setup are done once, not per call.
+@st.cache_resource
+def _fernet():
+    return Fernet(_fernet_key()) if CRYPTO_AVAILABLE else None
+
+def encrypt_secret(plaintext: str) -> str:
+    f = _fernet()
+    if not plaintext or f is None:
+        return plaintext
+    return f.encrypt(plaintext.encode()).decode()
+
+# Ciphertext → plaintext is fixed for a given key (no TTL is used), so repeated
+# reads of the same stored config skip Fernet's HMAC check + AES entirely.
+@functools.lru_cache(maxsize=16)
+def decrypt_secret(ciphertext: str) -> Optional[str]:
+    if not ciphertext:
+        return None
+    f = _fernet()
+    if f is None:
+        return ciphertext
+    try:
+        return f.decrypt(ciphertext.encode()).decode()
+    except Exception:
+        return None
+
+_KEY_MASK = "···" + "●" * 8
+
+def mask_key(key: str) -> str:
+    return f"{key[:8]}{_KEY_MASK}" if key and len(key) > 8 else "●●●"
+
+# ═════════════════════════════════════════════════════════════════════════════
+# DATABASE
+# ═════════════════════════════════════════════════════════════════════════════
+# Connections are pooled per process and leased one per thread. Streamlit runs
+# each script pass on its own thread, so a rerun's queries share a single handle;
+# when the thread ends its lease is dropped and the connection goes back to the
+# pool, keeping its prepared statements and page cache warm for the next rerun
+# instead of reopening and re-tuning a cold one. isolation_level=None: reads run
+# in autocommit; writes take explicit BEGIN IMMEDIATE / COMMIT via transaction().
+# The statement cache is sized above the app's distinct SQL strings, so every
+# query text is prepared once per connection and never evicted.
+_tls = local()
+_POOL_SIZE = 8
+_pool = queue.LifoQueue(maxsize=_POOL_SIZE)   # LIFO: the most recently used handle is the warmest
+
+def _open_conn():
+    conn = sqlite3.connect(str(DB_PATH), check_same_thread=False, timeout=30,
+                           isolation_level=None, cached_statements=256)
+    conn.row_factory = sqlite3.Row
+    for pragma in ("journal_mode=WAL", "synchronous=NORMAL", "foreign_keys=ON",
+                   "temp_store=MEMORY", "mmap_size=268435456", "cache_size=-20000"):
+        conn.execute(f"PRAGMA {pragma}")
+    return conn
+
+# Held in the thread-local; thread-local storage is released when its thread
+# exits, which returns the connection to the pool (or closes it if the pool is full).
+class _Lease:
+    __slots__ = ("conn",)
+    def __init__(self, conn): self.conn = conn
+    def __del__(self):
+        conn = self.conn
+        try:
+            if conn.in_transaction: conn.execute("ROLLBACK")
+            _pool.put_nowait(conn)
+        except Exception:
+            conn.close()
+
+def get_conn():
+    lease = getattr(_tls, "lease", None)
+    if lease is None:
+        try: conn = _pool.get_nowait()
+        except queue.Empty: conn = _open_conn()
+        lease = _tls.lease = _Lease(conn)
+    return lease.conn
+
+# Writers take the write lock up front (IMMEDIATE); readers pass "DEFERRED" for a
+# consistent snapshot across several SELECTs without blocking writers.
+@contextmanager
+def transaction(mode="IMMEDIATE"):
+    conn = get_conn()
+    if conn.in_transaction:     # nested: the outer block commits
+        yield conn; return
+    conn.execute(f"BEGIN {mode}")
+    try:
+        yield conn
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+# Schema setup is idempotent, so it runs once per process rather than on every rerun.
+@st.cache_resource(show_spinner=False)
+def init_db():
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = get_conn()
+    # executescript manages its own transaction (it COMMITs any open one first).
+    conn.executescript("""
+    CREATE TABLE IF NOT EXISTS projects (
+        id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        description TEXT,
+        status TEXT DEFAULT 'planning',
+        priority TEXT DEFAULT 'medium',
+        start_date TEXT, end_date TEXT,
+        team_size INTEGER DEFAULT 1,
+        velocity REAL DEFAULT 20.0,
+        budget REAL DEFAULT 10000.0,
+        budget_spent REAL DEFAULT 0.0,
+        total_points INTEGER DEFAULT 0,
+        completed_points INTEGER DEFAULT 0,
+        created_at TEXT DEFAULT (datetime('now')),
+        updated_at TEXT DEFAULT (datetime('now'))
+    );
+    CREATE TABLE IF NOT EXISTS project_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        project_id TEXT NOT NULL,
+        event_type TEXT NOT NULL,
+        detail TEXT,
+        created_at TEXT DEFAULT (datetime('now'))
+    );
+    CREATE TABLE IF NOT EXISTS team_members (
+        id TEXT PRIMARY KEY,
+        project_id TEXT NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+        name TEXT NOT NULL,
+        role TEXT,
+        email TEXT,
+        workload REAL DEFAULT 0.0,
+        morale REAL DEFAULT 80.0,
+        skills TEXT DEFAULT '[]',
+        daily_rate REAL DEFAULT 0.0,
+        created_at TEXT DEFAULT (datetime('now'))
+    );
+    CREATE TABLE IF NOT EXISTS sprints (
+        id TEXT PRIMARY KEY,
+        project_id TEXT NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+        number INTEGER NOT NULL,
+        goal TEXT,
+        start_date TEXT, end_date TEXT,
+        planned_points INTEGER DEFAULT 0,
+        completed_points INTEGER DEFAULT 0,
+        blockers TEXT DEFAULT '[]',
+        retro_notes TEXT DEFAULT '{}',
+        status TEXT DEFAULT 'planned',
+        created_at TEXT DEFAULT (datetime('now')),
+        completion_pct REAL GENERATED ALWAYS AS (MIN(100.0, completed_points*100.0/COALESCE(NULLIF(planned_points,0),1))) VIRTUAL
+    );
+    CREATE TABLE IF NOT EXISTS risks (
+        id TEXT PRIMARY KEY,
+        project_id TEXT NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+        title TEXT NOT NULL,
+        description TEXT,
+        category TEXT DEFAULT 'technical',
+        probability INTEGER DEFAULT 2,
+        impact INTEGER DEFAULT 2,
+        status TEXT DEFAULT 'open',
+        owner TEXT,
+        mitigation TEXT,
+        created_at TEXT DEFAULT (datetime('now')),
+        score INTEGER GENERATED ALWAYS AS (probability*impact) VIRTUAL
+    );
+    CREATE TABLE IF NOT EXISTS budget_entries (
+        id TEXT PRIMARY KEY,
+        project_id TEXT NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+        description TEXT NOT NULL,
+        amount REAL NOT NULL,
+        entry_type TEXT DEFAULT 'expense',
+        category TEXT DEFAULT 'other',
+        entry_date TEXT DEFAULT (date('now')),
+        created_at TEXT DEFAULT (datetime('now'))
+    );
+    CREATE TABLE IF NOT EXISTS ai_config (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        provider TEXT DEFAULT 'deepseek',
+        encrypted_api_key TEXT,
+        model TEXT DEFAULT 'deepseek-chat',
+        base_url TEXT DEFAULT 'https://api.deepseek.com',
+        monthly_budget REAL DEFAULT 50.0,
+        features TEXT DEFAULT '["therapy","simulator","insights","retro","risk","forecast"]',
+        is_active INTEGER DEFAULT 1,
+        updated_at TEXT DEFAULT (datetime('now'))
+    );
+    CREATE TABLE IF NOT EXISTS ai_usage_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        provider TEXT, model TEXT, feature TEXT,
+        prompt_tokens INTEGER DEFAULT 0,
+        completion_tokens INTEGER DEFAULT 0,
+        cost_usd REAL DEFAULT 0.0,
+        success INTEGER DEFAULT 1,
+        error_msg TEXT,
+        duration_ms INTEGER,
+        created_at TEXT DEFAULT (datetime('now'))
+    );
+    -- Indexes matching the getters' WHERE / ORDER BY, so they read in index order.
+    CREATE INDEX IF NOT EXISTS idx_team_pid_name    ON team_members(project_id, name);
+    CREATE INDEX IF NOT EXISTS idx_sprints_pid_num  ON sprints(project_id, number);
+    DROP INDEX IF EXISTS idx_risks_pid_score;
+    CREATE INDEX IF NOT EXISTS idx_budget_pid_date  ON budget_entries(project_id, entry_date DESC);
+    DROP INDEX IF EXISTS idx_hist_pid_created;
+    CREATE INDEX IF NOT EXISTS idx_hist_pid_id      ON project_history(project_id, id DESC);
+    -- Covers get_monthly_cost (range + SUM) without touching the table.
+    DROP INDEX IF EXISTS idx_usage_month;
+    CREATE INDEX IF NOT EXISTS idx_usage_cost       ON ai_usage_log(success, created_at, cost_usd);
+    """)
+    # Databases created before risks.score / sprints.completion_pct existed get
+    # them added (only VIRTUAL generated columns can be added by ALTER TABLE).
+    if not any(c["name"]=="score" for c in conn.execute("PRAGMA table_xinfo(risks)")):
+        conn.execute("ALTER TABLE risks ADD COLUMN score INTEGER GENERATED ALWAYS AS (probability*impact) VIRTUAL")
+    if not any(c["name"]=="completion_pct" for c in conn.execute("PRAGMA table_xinfo(sprints)")):
+        conn.execute("ALTER TABLE sprints ADD COLUMN completion_pct REAL GENERATED ALWAYS AS "
+                     "(MIN(100.0, completed_points*100.0/COALESCE(NULLIF(planned_points,0),1))) VIRTUAL")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_risks_score ON risks(project_id, score DESC)")
+
+# ── Query helpers ─────────────────────────────────────────────────────────────
+def db_rows(q, p=()):
+    return [dict(r) for r in get_conn().execute(q, p).fetchall()]
+
+# sqlite3.Row list, no per-row dict — for callers that go straight into a
+# DataFrame. Rows don't pickle, so anything behind st.cache_data uses db_rows.
+def db_rows_raw(q, p=()):
+    return get_conn().execute(q, p).fetchall()
+
+def db_one(q, p=()):
+    r = get_conn().execute(q, p).fetchone(); return dict(r) if r else None
+
+def db_exec(q, p=()):
+    with transaction() as c: c.execute(q, p)
+
+def db_execmany(q, rows):
+    with transaction() as c: c.executemany(q, rows)
+
+# Multi-row INSERT: one statement per chunk of rows instead of one step per row.
+# Chunked to stay under SQLite's historical 999 bound-parameter limit.
+def insert_rows(c, table, cols, rows):
+    per_row = "(" + ",".join("?" * len(cols)) + ")"
+    step = max(1, 999 // len(cols))
+    for i in range(0, len(rows), step):
+        chunk = rows[i:i+step]
+        c.execute(f"INSERT INTO {table} ({','.join(cols)}) VALUES {','.join([per_row] * len(chunk))}",
+                  list(itertools.chain.from_iterable(chunk)))
+
+# Primary keys for new rows: 64 random bits as 16 hex chars — less than half a
+# uuid4 string, so denser id and foreign-key index pages. Existing uuid ids stay
+# valid; the columns are plain TEXT either way.
+def new_id(): return secrets.token_hex(8)
+
+# n ids from a single urandom read, for bulk inserts.
+def new_ids(n):
+    raw = secrets.token_bytes(8 * n)
+    return [raw[i:i+8].hex() for i in range(0, 8 * n, 8)]
+
+# ── Project helpers ───────────────────────────────────────────────────────────
+def get_projects(): return db_rows("SELECT * FROM projects ORDER BY created_at DESC")
+
+def get_project(pid): return db_one("SELECT * FROM projects WHERE id=?", (pid,))
+
+def get_team(pid):
+    rows = db_rows("SELECT * FROM team_members WHERE project_id=? ORDER BY name", (pid,))
+    for r in rows: r["skills"] = json_loads(r.get("skills") or "[]")
+    return rows
+
+def get_sprints(pid):
+    # Derived columns come from SQLite; only the JSON columns are decoded here.
+    rows = db_rows("SELECT *, completed_points AS velocity FROM sprints WHERE project_id=? ORDER BY number",
+                   (pid,))
+    for r in rows:
+        r["blockers"] = json_loads(r.get("blockers") or "[]")
+        r["retro_notes"] = json_loads(r.get("retro_notes") or "{}")
+    return rows
+
+def get_risks(pid): return db_rows("SELECT * FROM risks WHERE project_id=? ORDER BY score DESC", (pid,))
+
+# Non-closed risks bucketed by (probability, impact) in one GROUP BY → {(p, i):
+# [titles]}, titles cut to 20 chars, highest score first. Feeds both risk matrices.
+@st.cache_data(ttl=60, show_spinner=False)
+def risk_matrix(pid, version):
+    rows = db_rows("""SELECT probability AS p, impact AS i,
+                             group_concat(substr(title,1,20), char(31)) AS titles
+                      FROM (SELECT probability, impact, title FROM risks
+                            WHERE project_id=? AND status!='closed' ORDER BY score DESC)
+                      GROUP BY probability, impact""", (pid,))
+    return {(r["p"], r["i"]): r["titles"].split("\x1f") for r in rows}
+
+# status → (risks, critical risks with score ≥ 12), counted in SQL for the summary
+# metrics, so the page header doesn't need the full rows.
+@st.cache_data(ttl=60, show_spinner=False)
+def get_risk_summary(pid, version):
+    return {r["status"]: (r["n"], r["crit"]) for r in db_rows(
+        "SELECT status, COUNT(*) AS n, SUM(score>=12) AS crit FROM risks WHERE project_id=? GROUP BY status", (pid,))}
+
+def get_budget_entries(pid): return db_rows("SELECT * FROM budget_entries WHERE project_id=? ORDER BY entry_date DESC", (pid,))
+
+# entry_type → total amount, summed in SQL for the budget metrics.
+@st.cache_data(ttl=60, show_spinner=False)
+def get_budget_summary(pid, version):
+    return {r["entry_type"]: r["total"] for r in db_rows(
+        "SELECT entry_type, SUM(amount) AS total FROM budget_entries WHERE project_id=? GROUP BY entry_type", (pid,))}
+
+# Newest first, a page at a time. Keyset pagination on the autoincrement id: the
+# next page seeks to before_id in idx_hist_pid_id instead of re-scanning.
+HISTORY_PAGE = 30
+
+def get_project_history(pid, before_id=None):
+    if before_id is None:
+        return db_rows("SELECT * FROM project_history WHERE project_id=? ORDER BY id DESC LIMIT ?", (pid, HISTORY_PAGE))
+    return db_rows("SELECT * FROM project_history WHERE project_id=? AND id<? ORDER BY id DESC LIMIT ?",
+                   (pid, before_id, HISTORY_PAGE))
+
+_HISTORY_INSERT = "INSERT INTO project_history (project_id,event_type,detail) VALUES (?,?,?)"
+
+def log_event(pid, event_type, detail=""):
+    db_exec(_HISTORY_INSERT, (pid, event_type, detail))
+    bump_data_version(pid)
+
+# A form write and its history row in one transaction (one commit, one WAL sync).
+# The version bump follows the COMMIT, so no reader caches the pre-write rows under it.
+def db_exec_logged(q, p, pid, event_type, detail=""):
+    with transaction() as c:
+        c.execute(q, p)
+        c.execute(_HISTORY_INSERT, (pid, event_type, detail))
+    bump_data_version(pid)
+
+# ── Data versions ─────────────────────────────────────────────────────────────
+# Process-wide write counter per project; every project-scoped write goes through
+# log_event (or bumps explicitly), so cached aggregates keyed on it never go stale.
+# The None slot counts writes to any project and keys portfolio-wide caches.
+@st.cache_resource
+def _data_versions(): return {}
+
+def data_version(pid=None): return _data_versions().get(pid, 0)
+
+def bump_data_version(pid):
+    v = _data_versions(); v[pid] = v.get(pid, 0) + 1; v[None] = v.get(None, 0) + 1
+
+# ── Page timings ── process-wide render stats per nav page (runs, total ms, worst
+# ms), recorded by the router and listed on SETTINGS behind ?debug=1.
+@st.cache_resource
+def _page_timings(): return {}
+
+_page_timings_lock = Lock()
+
+def record_page_time(label, ms):
+    with _page_timings_lock:
+        t = _page_timings().setdefault(label, [0, 0.0, 0.0])
+        t[0] += 1; t[1] += ms; t[2] = max(t[2], ms)
+
+def page_timings():
+    with _page_timings_lock:
+        return [{"page": k, "runs": n, "avg_ms": round(tot/n, 1), "max_ms": round(mx, 1),
+                 "total_ms": round(tot, 1)} for k, (n, tot, mx) in _page_timings().items()]
+
+# ── Cache hit counts ── process-wide (calls, misses) for the caches read on every
+# rerun, listed beside the page timings. A miss is counted inside the cached body,
+# which only runs when there is no entry; a low ratio means an argument is busting it.
+@st.cache_resource
+def _cache_counts(): return {}
+
+_cache_counts_lock = Lock()
+
+def _count_cache(name, miss=False):
+    with _cache_counts_lock:
+        _cache_counts().setdefault(name, [0, 0])[miss] += 1
+
+def cache_hit_stats():
+    with _cache_counts_lock:
+        return [{"cache": k, "calls": n, "misses": m, "hit_ratio": round(max(0, 1 - m/n), 3) if n else None}
+                for k, (n, m) in _cache_counts().items()]
+
+# Project list used by the sidebar selector on every rerun; refreshed when any
+# project-scoped write bumps the portfolio version.
+@st.cache_data(ttl=60, show_spinner=False)
+def _load_projects(version):
+    _count_cache("projects", miss=True)
+    return get_projects()
+
+def list_projects():
+    _count_cache("projects")
+    return _load_projects(data_version())
+
+# Sidebar selector options: project by name, in list order, built once per data
+# version. A repeated name keeps its first (newest) project, as the list did.
+@st.cache_data(ttl=60, show_spinner=False)
+def _projects_by_name(version):
+    by_name = {}
+    for p in _load_projects(version): by_name.setdefault(p["name"], p)
+    return by_name
+
+# Headline numbers for every project in one round-trip, keyed by project id.
+@st.cache_data(ttl=60, show_spinner=False)
+def get_portfolio_summary(version):
+    rows = db_rows("""
+        SELECT p.id, p.name, p.budget,
+               (SELECT COUNT(*) FROM team_members t WHERE t.project_id=p.id) AS team_count,
+               (SELECT COALESCE(AVG(s.completed_points),0) FROM sprints s
+                 WHERE s.project_id=p.id AND s.status='completed') AS avg_velocity,
+               (SELECT COUNT(*) FROM risks r WHERE r.project_id=p.id AND r.status='open') AS open_risks
+        FROM projects p ORDER BY p.created_at DESC""")
+    return {r["id"]: r for r in rows}
+
+# Every per-project table for one project, read back-to-back on the thread's
+# connection inside one read transaction (a consistent snapshot) and parsed once.
+# Keyed on the project's data version, so any write through log_event /
+# bump_data_version invalidates it.
+@st.cache_data(ttl=60, show_spinner=False)
+def load_project_bundle(pid, version):
+    with transaction("DEFERRED"):
+        return SimpleNamespace(team=get_team(pid), sprints=get_sprints(pid), risks=get_risks(pid),
+                               entries=get_budget_entries(pid), history=get_project_history(pid))
+
+# Export CSVs, serialized once per data version instead of on every rerun of
+# the page that offers the download. Column drops match the on-page exports.
+_EXPORT_DROP = MappingProxyType({"sprints": ("blockers", "retro_notes")})
+
+@st.cache_data(ttl=60, show_spinner=False)
+def project_csv(pid, version, table):
+    import pandas as pd
+    drop = _EXPORT_DROP.get(table, ())
+    rows = getattr(load_project_bundle(pid, version), table)
+    return df_to_csv(pd.DataFrame([{k: v for k, v in r.items() if k not in drop} for r in rows]))
+
+@st.cache_data(ttl=60, show_spinner=False)
+def project_aggregates(pid, version):
+    b = load_project_bundle(pid, version)
+    team, sprints, risks, entries = b.team, b.sprints, b.risks, b.entries
+    # One pass per list: each feeds several aggregates.
+    m_sum = w_sum = daily_sum = 0.0
+    overloaded = low_morale = 0
+    for m in team:
+        m_sum += m["morale"]; w_sum += m["workload"]; daily_sum += m.get("daily_rate",0)
+        if m["workload"]>85: overloaded += 1
+        if m["morale"]<60: low_morale += 1
+    completed_sp, velocities = [], []
+    for s in sprints:
+        if s["status"]=="completed": completed_sp.append(s); velocities.append(s["completed_points"])
+    open_risks = [r for r in risks if r["status"]=="open"]
+    expenses, total_expense, total_income = [], 0.0, 0.0
+    for e in entries:
+        if e["entry_type"]=="expense": expenses.append(e); total_expense += e["amount"]
+        elif e["entry_type"]=="income": total_income += e["amount"]
+    return SimpleNamespace(
+        team=team, sprints=sprints, risks=risks, entries=entries, completed_sp=completed_sp,
+        avg_morale   = m_sum/len(team) if team else 75.0,
+        avg_workload = w_sum/len(team) if team else 70.0,
+        overloaded=overloaded, low_morale=low_morale, total_daily=daily_sum,
+        avg_velocity = sum(velocities)/len(velocities) if velocities else 30.0,
+        open_risks=open_risks, velocities=velocities,
+        expenses=expenses, total_expense=total_expense, total_income=total_income,
+        sprint_by_name = {f"Sprint {s['number']}: {s.get('goal','')[:45]}": s for s in completed_sp},
+    )
+
+# Both are read several times per rerun (header, sidebar, pages). Cached until the
+# matching writer below clears them; the TTL only bounds edits made outside the app.
+@st.cache_data(ttl=60, show_spinner=False)
+def _load_ai_config():
+    _count_cache("ai_config", miss=True)
+    cfg = db_one("SELECT * FROM ai_config WHERE is_active=1 ORDER BY updated_at DESC LIMIT 1")
+    if cfg:
+        cfg["api_key"] = decrypt_secret(cfg.get("encrypted_api_key") or "")
+        cfg["features"] = json_loads(cfg.get("features") or "[]")
+    return cfg
+
+def get_ai_config():
+    _count_cache("ai_config")
+    return _load_ai_config()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_monthly_cost():
+    # Half-open range on created_at (not strftime on it): a covering-index range
+    # scan of idx_usage_cost.
+    r = db_one("SELECT COALESCE(SUM(cost_usd),0) AS t FROM ai_usage_log WHERE success=1 "
+               "AND created_at >= date('now','start of month') "
+               "AND created_at < date('now','start of month','+1 month')")
+    return float(r["t"]) if r else 0.0
+
+def save_ai_config(provider, api_key, model, base_url, budget, features):
+    features = list(features)   # stored as JSON via the list adapter
+    st.session_state["_ai_ready"] = bool(api_key)
+    # Re-saving the active config (repeat activation, unchanged SAVE) writes nothing.
+    cur = get_ai_config()
+    if cur and (cur["provider"], cur["api_key"], cur["model"], cur["base_url"], cur["monthly_budget"],
+                cur["features"]) == (provider, api_key, model, base_url, budget, features):
+        return
+    with transaction() as c:
+        c.execute("UPDATE ai_config SET is_active=0")
+        c.execute("INSERT INTO ai_config (provider,encrypted_api_key,model,base_url,monthly_budget,features,is_active,updated_at) VALUES (?,?,?,?,?,?,1,datetime('now'))",
+                  (provider, encrypt_secret(api_key), model, base_url, budget, features))
+    _load_ai_config.clear()
+
+# ── AI usage log ── rows are queued and written by a daemon thread, so the AI
+# call path never waits on a commit. The flusher blocks for the first row, then
+# takes whatever else is queued (up to 100) and writes it with one executemany;
+# under light load a row lands within milliseconds. Anything still queued at
+# interpreter exit is flushed by atexit.
+_USAGE_INSERT = "INSERT INTO ai_usage_log (provider,model,feature,prompt_tokens,completion_tokens,cost_usd,success,error_msg,duration_ms) VALUES (?,?,?,?,?,?,?,?,?)"
+
+def _flush_usage_log(q, first=None):
+    batch = [] if first is None else [first]
+    while len(batch) < 100:
+        try: batch.append(q.get_nowait())
+        except queue.Empty: break
+    if batch:
+        db_execmany(_USAGE_INSERT, batch)
+        if any(row[6] for row in batch): get_monthly_cost.clear()
+
+def _usage_log_worker(q):
+    while True:
+        first = q.get()
+        try: _flush_usage_log(q, first)
+        except Exception: pass   # a lost log row must never kill the flusher
+
+@st.cache_resource
+def _usage_log_queue():
+    q = queue.Queue()
+    Thread(target=_usage_log_worker, args=(q,), daemon=True, name="ai-usage-log").start()
+    atexit.register(_flush_usage_log, q)
+    return q
+
+def log_ai_usage(provider, model, feature, ptok, ctok, cost, success, error, duration_ms):
+    _usage_log_queue().put((provider, model, feature, ptok, ctok, cost, int(success), error, duration_ms))
+
+# ═════════════════════════════════════════════════════════════════════════════
+# SEEDER
+# ═════════════════════════════════════════════════════════════════════════════
+SAMPLE_TEAM = [
+    ("Alice Chen",   "Tech Lead",       "alice@example.com",  ["Python","Architecture","AWS"],  85.0, 75.0, 800.0),
+    ("Bob Smith",    "Frontend Dev",    "bob@example.com",    ["React","TypeScript","CSS"],      70.0, 85.0, 650.0),
+    ("Carol Davis",  "Backend Dev",     "carol@example.com",  ["Python","FastAPI","PostgreSQL"], 90.0, 62.0, 700.0),
+    ("David Wilson", "DevOps",          "david@example.com",  ["AWS","Docker","Terraform"],      75.0, 80.0, 750.0),
+    ("Eva Brown",    "QA Engineer",     "eva@example.com",    ["Selenium","pytest","k6"],        60.0, 90.0, 600.0),
+    ("Frank Miller", "Product Manager", "frank@example.com",  ["Agile","Scrum","Figma"],         80.0, 70.0, 720.0),
+]
+
+SAMPLE_RISKS = [
+    ("Third-party API dependency",  "Core payments rely on external API with 99.5% SLA", "technical",  3, 4, "open",   "Alice Chen",   "Implement circuit breaker + fallback provider"),
+    ("Key person dependency",       "Alice Chen holds critical architecture knowledge",   "people",     2, 5, "open",   "Frank Miller", "Knowledge transfer sessions + documentation sprint"),
+    ("Regulatory compliance gap",   "GDPR audit scheduled Q4 — current coverage 60%",    "compliance", 3, 3, "mitigated","Carol Davis", "Engage external DPO, complete gap analysis"),
+    ("Budget overrun risk",         "Infra costs trending 15% above forecast",           "financial",  3, 3, "open",   "David Wilson", "Reserved instance purchasing, cost alerting"),
+    ("Scope creep",                 "Stakeholder feature requests growing each sprint",  "delivery",   4, 2, "open",   "Frank Miller", "Strict change control process, sprint goal lock-in"),
+]
+
+def _has_projects(): return db_one("SELECT 1 AS x FROM projects LIMIT 1") is not None
+
+# Checked every run (a one-row probe) so deleting the last project re-seeds the
+# sample, as before.
+def seed_if_empty():
+    if _has_projects(): return
+    sprint_data = [(45,42,"Launch checkout flow","completed"),(45,40,"Payment integration","completed"),
+                   (45,35,"API issues","completed"),(45,43,"Performance optimisation","completed"),
+                   (45,38,"Mobile responsive","active"),(45,0,"Search & recommendations","planned")]
+    budget_items = [
+        ("AWS infrastructure (Q1)","expense","infrastructure",12400.0,"2024-01-31"),
+        ("Contractor: UX designer","expense","people",8500.0,"2024-02-15"),
+        ("Software licences","expense","tools",3200.0,"2024-02-28"),
+        ("AWS infrastructure (Q2)","expense","infrastructure",14100.0,"2024-04-30"),
+        ("Security audit","expense","compliance",6800.0,"2024-03-20"),
+        ("AWS infrastructure (Q3)","expense","infrastructure",13900.0,"2024-07-31"),
+        ("Performance testing tools","expense","tools",1800.0,"2024-05-10"),
+        ("Training: team certification","expense","people",4200.0,"2024-06-01"),
+        ("Client milestone payment","income","revenue",22500.0,"2024-04-01"),
+    ]
+    ids = iter(new_ids(1 + len(SAMPLE_TEAM) + len(sprint_data) + len(SAMPLE_RISKS) + len(budget_items)))
+    pid = next(ids)
+    # Whole sample project in one transaction (one commit), one multi-row INSERT per table.
+    with transaction() as c:
+        c.execute("INSERT INTO projects (id,name,description,status,priority,start_date,end_date,team_size,velocity,budget,budget_spent,total_points,completed_points) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                  (pid,"E-Commerce Platform","Modern e-commerce with AI-driven product recommendations and real-time inventory","active","high","2024-01-15","2024-09-30",6,45.5,150000.0,87400.0,270,210))
+        insert_rows(c, "team_members", ("id","project_id","name","role","email","skills","workload","morale","daily_rate"),
+                    [(next(ids),pid,name,role,email,skills,workload,morale,rate)
+                     for name, role, email, skills, workload, morale, rate in SAMPLE_TEAM])
+        insert_rows(c, "sprints", ("id","project_id","number","goal","start_date","end_date","planned_points","completed_points","blockers","status"),
+                    [(next(ids),pid,i,goal,f"2024-{i:02d}-01",f"2024-{i:02d}-14",pl,co,
+                      ["Payment gateway timeout errors"] if i==3 else [],status)
+                     for i,(pl,co,goal,status) in enumerate(sprint_data,1)])
+        insert_rows(c, "risks", ("id","project_id","title","description","category","probability","impact","status","owner","mitigation"),
+                    [(next(ids),pid,title,desc,cat,prob,impact,status,owner,mitigation)
+                     for title,desc,cat,prob,impact,status,owner,mitigation in SAMPLE_RISKS])
+        insert_rows(c, "budget_entries", ("id","project_id","description","amount","entry_type","category","entry_date"),
+                    [(next(ids),pid,desc,amount,etype,cat,edate)
+                     for desc,etype,cat,amount,edate in budget_items])
+        insert_rows(c, "project_history", ("project_id","event_type","detail"),
+                    [(pid,"project_created","Initial project setup"),
+                     (pid,"status_change","Status set to active")])
+    bump_data_version(pid)
+
+# ═════════════════════════════════════════════════════════════════════════════
+# RATE LIMITER
+# ═════════════════════════════════════════════════════════════════════════════
+# Bucket state is one (tokens, last) tuple, swapped by a single assignment, so a
+# lock-free read always sees a consistent pair. An empty bucket is rejected on
+# that read alone; only a grant takes the lock, to refill and spend atomically.
+class RateLimiter:
+    __slots__ = ("_max", "_rate", "_state", "_lock")
+    def __init__(self, max_tokens, period=60.0):
+        self._max=float(max_tokens); self._rate=self._max/period
+        self._state=(self._max, time.monotonic()); self._lock=Lock()
+    def acquire(self):
+        now=time.monotonic()
+        tokens, last = self._state
+        if tokens+(now-last)*self._rate<1.0: return False
+        with self._lock:
+            tokens, last = self._state
+            tokens=min(self._max, tokens+(now-last)*self._rate)
+            if tokens<1.0: return False
+            self._state=(tokens-1.0, max(now, last)); return True
+
+# One bucket per API key, shared by every session in the process: the provider
+# limits per key, so per-session buckets let N open tabs send N× the RPM.
+@st.cache_resource
+def _rate_limiters(): return {}
+
+def get_rl(api_key=""):
+    k = hashlib.sha256(api_key.encode()).hexdigest()[:16]
+    rls = _rate_limiters()
+    return rls.get(k) or rls.setdefault(k, RateLimiter(RATE_LIMIT_RPM))
+
+# ═════════════════════════════════════════════════════════════════════════════
+# AI ENGINE
+# ═════════════════════════════════════════════════════════════════════════════
+@dataclass
+class AIResponse:
+    success: bool
+    content: Optional[str] = None
+    error: Optional[str] = None
+    cost_usd: float = 0.0
+    duration_ms: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    model: str = ""
+
+# Shared pre-flight for call_ai/call_ai_stream → ((model, url, headers, payload), None) or (None, error).
+def _ai_prepare(prompt: str, feature: str, context: Optional[dict], stream: bool = False):
+    cfg = get_ai_config()
+    if not cfg or not cfg.get("api_key"):
+        return None, AIResponse(False, error="AI not configured — add API key in ⚙ Settings")
+    monthly_cost = get_monthly_cost()
+    budget = cfg.get("monthly_budget", MONTHLY_BUDGET)
+    if monthly_cost >= budget:
+        return None, AIResponse(False, error=f"Monthly budget ${budget:.2f} exceeded (${monthly_cost:.2f} spent)")
+    if not get_rl(cfg["api_key"]).acquire():
+        return None, AIResponse(False, error="Rate limit — wait a moment")
+    model = cfg.get("model","deepseek-chat")
+    api_key = cfg["api_key"]
+    base_url = cfg.get("base_url", DEEPSEEK_URL)
+    messages = [_SYSTEM_MESSAGES.get(feature) or _SYSTEM_MESSAGES["general"]]
+    if context:
+        messages.append({"role":"user","content":f"Context: {json_dumps(context)[:2000]}"})
+    messages.append({"role":"user","content":prompt[:2500]})
+    headers = {"Authorization":f"Bearer {api_key}"}
+    payload = {"model":model,"messages":messages,"temperature":0.7,"max_tokens":MAX_TOKENS,"stream":stream}
+    if stream: payload["stream_options"] = {"include_usage": True}
+    return (model, f"{base_url}/chat/completions", headers, payload), None
+
+def _ai_cost(model, ptok, ctok):
+    p_in, p_out = _PRICE_PER_TOKEN.get(model, _DEFAULT_PRICE)
+    return ptok*p_in + ctok*p_out
+
+# ── HTTP ── one pooled Session per process, so repeat calls reuse the TCP+TLS
+# connection. urllib3 retries 429/503 up to twice with exponential backoff
+# (or the server's Retry-After, capped at the same 8 s) and one failed connect;
+# read timeouts are not retried.
+# Up to 1 s of random jitter per wait keeps sessions throttled together from
+# retrying in lockstep (urllib3 2.x; 1.26 has no jitter and retries plain).
+# Content-Type is a session header, so callers pass only Authorization.
+_RETRY_KW = dict(total=3, connect=1, read=False, status=2, backoff_factor=1.0,
+                 status_forcelist=(429, 503), allowed_methods=frozenset({"POST"}),
+                 raise_on_status=False)
+_RETRY_MAX_WAIT = 8
+
+# urllib3 sleeps for the whole Retry-After (backoff_max does not apply to it),
+# so a server asking for minutes would hold the script thread that long.
+class _CappedRetry(Retry):
+    def get_retry_after(self, response):
+        ra = super().get_retry_after(response)
+        return None if ra is None else min(ra, _RETRY_MAX_WAIT)
+
+@st.cache_resource
+def _http():
+    s = requests.Session()
+    s.headers["Content-Type"] = "application/json"
+    try: retry = _CappedRetry(**_RETRY_KW, backoff_jitter=1.0, backoff_max=_RETRY_MAX_WAIT)
+    except TypeError: retry = _CappedRetry(**_RETRY_KW)
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=retry)
+    s.mount("https://", adapter); s.mount("http://", adapter)
+    return s
+
+def _http_error(r):
+    return f"HTTP {r.status_code}" if r.status_code in (429,503) else f"HTTP {r.status_code}: {r.text[:150]}"
+
+def call_ai(prompt: str, feature: str = "general", context: Optional[dict] = None) -> AIResponse:
+    req, err = _ai_prepare(prompt, feature, context)
+    if err: return err
+    model, url, headers, payload = req
+    try:
+        t0 = time.monotonic()
+        r = _http().post(url,headers=headers,json=payload,timeout=AI_TIMEOUT)
+        dur = int((time.monotonic()-t0)*1000)
+        if r.status_code==200:
+            data=r.json(); content=data["choices"][0]["message"]["content"]
+            usage=data.get("usage",{}); ptok=usage.get("prompt_tokens",0); ctok=usage.get("completion_tokens",0)
+            cost=_ai_cost(model,ptok,ctok)
+            log_ai_usage("deepseek",model,feature,ptok,ctok,cost,True,None,dur)
+            return AIResponse(True,content=content,cost_usd=cost,duration_ms=dur,prompt_tokens=ptok,completion_tokens=ctok,model=model)
+        last_error = _http_error(r)
+    except requests.exceptions.Timeout: last_error="Timeout"
+    except requests.exceptions.ConnectionError: last_error="Cannot reach API"
+    except Exception as e: last_error=str(e)
+    log_ai_usage("deepseek",model,feature,0,0,0,False,last_error,0)
+    return AIResponse(False,error=last_error)
+
+class _StreamHTTPError(Exception): pass
+
+# Yields content deltas as they arrive (SSE); the final result/usage is written into `out`.
+def call_ai_stream(prompt: str, feature: str = "general", context: Optional[dict] = None,
+                   out: Optional[AIResponse] = None):
+    out = out if out is not None else AIResponse(False)
+    req, err = _ai_prepare(prompt, feature, context, stream=True)
+    if err: out.error = err.error; return
+    model, url, headers, payload = req
+    out.model, parts = model, []
+    # Retries (see _http) happen before the response starts, so a half-streamed
+    # answer is never replayed.
+    try:
+        t0 = time.monotonic()
+        with _http().post(url,headers=headers,json=payload,timeout=AI_TIMEOUT,stream=True) as r:
+            if r.status_code!=200: raise _StreamHTTPError(_http_error(r))
+            usage = {}
+            # Raw byte lines: an event-stream without a charset would otherwise be
+            # decoded as ISO-8859-1; the JSON parser reads the UTF-8 bytes itself.
+            for line in r.iter_lines():
+                if not line.startswith(b"data:"): continue
+                data = line[5:].strip()
+                if data==b"[DONE]": break
+                chunk = json_loads(data)
+                usage = chunk.get("usage") or usage
+                for ch in chunk.get("choices") or ():
+                    delta = (ch.get("delta") or {}).get("content")
+                    if delta: parts.append(delta); yield delta
+        dur = int((time.monotonic()-t0)*1000)
+        ptok=usage.get("prompt_tokens",0); ctok=usage.get("completion_tokens",0)
+        cost=_ai_cost(model,ptok,ctok)
+        log_ai_usage("deepseek",model,feature,ptok,ctok,cost,True,None,dur)
+        out.success, out.content, out.cost_usd, out.duration_ms = True, "".join(parts), cost, dur
+        out.prompt_tokens, out.completion_tokens = ptok, ctok
+        return
+    except requests.exceptions.Timeout: last_error="Timeout"
+    except requests.exceptions.ConnectionError: last_error="Cannot reach API"
+    except Exception as e: last_error=str(e)
+    log_ai_usage("deepseek",model,feature,0,0,0,False,last_error,0)
+    out.error = last_error
+
+# ── Response cache ── identical (prompt, feature, context) reuses the last answer.
+# Only successes are stored, so budget/rate-limit/network errors are retried next click.
+# Entries are kept in insertion (= age) order: each insert drops the expired ones
+# from the old end and then the oldest beyond _AI_CACHE_MAX.
+_AI_CACHE_MAX = 256
+_ai_cache_lock = Lock()
+
+@st.cache_resource
+def _ai_cache(): return {}
+
+def _ai_cache_put(key, resp):
+    now = time.time()
+    with _ai_cache_lock:
+        c = _ai_cache()
+        c.pop(key, None); c[key] = (now, resp)
+        for k, (t, _) in list(c.items()):
+            if len(c) <= _AI_CACHE_MAX and now - t < AI_CACHE_TTL: break
+            del c[k]
+
+# The active model and endpoint are part of the key, so switching either in
+# SETTINGS never serves an answer produced by the previous one.
+def _ai_cache_key(prompt, feature, context):
+    cfg = get_ai_config() or {}
+    model, base_url = cfg.get("model", "deepseek-chat"), cfg.get("base_url", DEEPSEEK_URL)
+    ctx_json = json.dumps(context, sort_keys=True, default=str) if context else ""
+    return hashlib.sha1(f"{model}\x00{base_url}\x00{feature}\x00{ctx_json}\x00{prompt}".encode()).hexdigest()
+
+def _ai_cache_get(key):
+    hit = _ai_cache().get(key)
+    if hit and time.time() - hit[0] < AI_CACHE_TTL:
+        return replace(hit[1], cost_usd=0.0, duration_ms=0)
+    return None
+
+def cached_call_ai(prompt: str, feature: str = "general", context: Optional[dict] = None) -> AIResponse:
+    key = _ai_cache_key(prompt, feature, context)
+    hit = _ai_cache_get(key)
+    if hit: return hit
+    resp = call_ai(prompt, feature, context)
+    if resp.success: _ai_cache_put(key, resp)
+    return resp
+
+# Several (prompt, feature, context) jobs at once: the calls are network-bound, so
+# their round-trips overlap on the pooled session. Yields (index, AIResponse) as
+# each finishes. Workers carry the script-run context so cached reads behave as
+# they do on the script thread; the rate limiter still gates every call.
+def cached_call_ai_many(jobs):
+    ctx = get_script_run_ctx()
+    def run(job):
+        add_script_run_ctx(None, ctx)
+        return cached_call_ai(*job)
+    with ThreadPoolExecutor(max_workers=max(1, len(jobs))) as ex:
+        futures = {ex.submit(run, job): i for i, job in enumerate(jobs)}
+        for f in as_completed(futures):
+            yield futures[f], f.result()
+
+# The key check has its own single-connection session with no retries, so the
+# (connect, read) timeout bounds the spinner: a dead endpoint fails in 3 s, and a
+# 429/503 is reported at once instead of being backed off and retried.
+_KEY_TEST_TIMEOUT = (3, 5)
+
+@st.cache_resource
+def _http_key_check():
+    s = requests.Session()
+    s.headers["Content-Type"] = "application/json"
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)
+    s.mount("https://", adapter); s.mount("http://", adapter)
+    return s
+
+def test_api_key(api_key, base_url):
+    try:
+        r=_http_key_check().post(f"{base_url}/chat/completions",
+            headers={"Authorization":f"Bearer {api_key}"},
+            json={"model":"deepseek-chat","messages":[{"role":"user","content":"Reply OK only."}],"max_tokens":5},
+            timeout=_KEY_TEST_TIMEOUT)
+        if r.status_code==200: return True,"✅  API key valid"
+        return False,f"❌  HTTP {r.status_code}: {r.text[:100]}"
+    except requests.exceptions.ConnectionError: return False,"❌  Cannot reach endpoint"
+    except requests.exceptions.Timeout: return False,"❌  Connection timed out"
+    except Exception as e: return False,f"❌  {e}"
+
+# Activation re-clicks reuse a successful check for a day; failures raise out of
+# the cached function so they are never stored and the next click tests again.
+# Entries are keyed on a hash of the arguments; the raw API key is not stored.
+class _KeyCheckFailed(Exception): pass
+
+@st.cache_data(ttl=24*60*60, show_spinner=False)
+def _verified_api_key(api_key, base_url):
+    _count_cache("api_key_check", miss=True)
+    ok, msg = test_api_key(api_key, base_url)
+    if not ok: raise _KeyCheckFailed(msg)
+    return msg
+
+def cached_test_api_key(api_key, base_url):
+    _count_cache("api_key_check")
+    try: return True, _verified_api_key(api_key, base_url)
+    except _KeyCheckFailed as e: return False, str(e)
+
+# ═════════════════════════════════════════════════════════════════════════════
+# UI HELPERS
+# ═════════════════════════════════════════════════════════════════════════════
+# Per-cell colours of the 5×5 matrix, flat and indexed by (prob-1)*5 + (impact-1).
+RISK_SCORE_COLOR = ("#393939","#393939","#f1c21b","#ff832b","#da1e28",
+                    "#393939","#f1c21b","#f1c21b","#ff832b","#da1e28",
+                    "#f1c21b","#f1c21b","#ff832b","#da1e28","#da1e28",
+                    "#ff832b","#ff832b","#da1e28","#da1e28","#da1e28",
+                    "#da1e28","#da1e28","#da1e28","#da1e28","#da1e28")
+
+# Score (prob × impact, 0–25) → (label, tag kind, border, cell background), built
+# once so rendering a risk is an index instead of a chain of comparisons.
+RISK_LEVELS = tuple(
+    ("CRITICAL","red","#da1e28","#2d0a0e") if s>=12 else
+    ("HIGH","orange","#ff832b","#231000") if s>=8 else
+    ("MEDIUM","yellow","#f1c21b","#1c1500") if s>=4 else
+    ("LOW","gray","#393939","#1e1e1e") for s in range(26))
+
+def tag(text, kind="blue"):
+    return f'<span class="ibm-tag ibm-tag-{kind}">{text}</span>'
+
+_STATUS_KIND   = {"active":"green","planning":"blue","completed":"gray","on_hold":"yellow","at_risk":"red"}
+_PRIORITY_KIND = {"critical":"red","high":"orange","medium":"yellow","low":"green"}
+
+def status_tag(status):
+    return tag(status.upper().replace("_"," "), _STATUS_KIND.get(status,"gray"))
+
+def priority_tag(p):
+    return tag(p.upper(), _PRIORITY_KIND.get(p,"gray"))
+
+# Every possible score's tag HTML, built once: a tag is then a tuple index.
+_RISK_TAGS = tuple(tag(f"{lvl[0]}  {s}", lvl[1]) for s, lvl in enumerate(RISK_LEVELS))
+
+def risk_score_tag(prob, impact):
+    return _RISK_TAGS[prob * impact]
+
+# ── Chart figures ── page charts are st.cache_resource figures keyed on (project,
+# data version), shared by every session. What that saves is the build (frames,
+# traces, plotly validation: ~8-40 ms per chart here). st.plotly_chart still runs
+# to_dict + to_json on each call (~0.4-1 ms) and has no public way to take a
+# pre-serialized spec: a dict is re-validated through go.Figure, which costs more
+# than the serialization it would skip. plotly_chart never mutates the figure, so
+# sharing one object is safe.
+
+# Shared by every figure; Plotly copies layout kwargs, so the cached dict is never mutated.
+@functools.lru_cache(maxsize=1)
+def plotly_theme():
+    return dict(
+        plot_bgcolor="#1e1e1e", paper_bgcolor="#1e1e1e",
+        font=dict(family="IBM Plex Mono", color="#c6c6c6", size=11),
+        xaxis=dict(gridcolor="#393939", linecolor="#525252", tickcolor="#525252"),
+        yaxis=dict(gridcolor="#393939", linecolor="#525252", tickcolor="#525252"),
+        margin=dict(l=8,r=8,t=36,b=8),
+        legend=dict(bgcolor="#1e1e1e",bordercolor="#393939",borderwidth=1),
+    )
+
+def _ai_result_header(header):
+    st.markdown(f"""
+        <div class="carbon-card">
+            <div class="mono-label">{header}</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+def _ai_result_footer(resp: AIResponse):
+    st.markdown(f'<span class="ibm-tag ibm-tag-gray">{resp.model}</span> '
+                f'<span class="ibm-tag ibm-tag-gray">${resp.cost_usd:.6f}</span> '
+                f'<span class="ibm-tag ibm-tag-gray">{resp.duration_ms}ms</span>',
+                unsafe_allow_html=True)
+
+def render_ai_result(resp: AIResponse, header: str):
+    if resp.success:
+        _ai_result_header(header)
+        st.markdown(resp.content)
+        _ai_result_footer(resp)
+    else:
+        st.error(f"AI Error: {resp.error}")
+
+def stream_ai_result(header: str, prompt: str, feature: str = "general", context: Optional[dict] = None):
+    # Tokens render as they arrive; a cached answer for the same inputs renders instantly.
+    key = _ai_cache_key(prompt, feature, context)
+    hit = _ai_cache_get(key)
+    if hit: render_ai_result(hit, header); return
+    resp = AIResponse(False)
+    # The header slot is filled on the first delta, so a failed call shows only the error.
+    slot = st.empty()
+    def deltas():
+        for i, delta in enumerate(call_ai_stream(prompt, feature, context, resp)):
+            if not i:
+                with slot: _ai_result_header(header)
+            yield delta
+    st.write_stream(deltas())
+    if resp.success:
+        _ai_cache_put(key, resp)
+        with slot: _ai_result_header(header)
+        _ai_result_footer(resp)
+    else:
+        st.error(f"AI Error: {resp.error}")
+
+def section_header(title, subtitle=""):
+    st.markdown(f"<h1>{title}</h1>", unsafe_allow_html=True)
+    if subtitle:
+        st.markdown(f"<p style='color:#a8a8a8;font-size:0.9rem;margin-top:-0.5rem;font-family:IBM Plex Mono,monospace'>{subtitle}</p>", unsafe_allow_html=True)
+
+# Written straight into a bytes buffer: no full-size str followed by an encoded copy.
+def df_to_csv(df):
+    buf = io.BytesIO(); df.to_csv(buf, index=False, encoding="utf-8", chunksize=10_000)
+    return buf.getvalue()
+
+# Narrowest int dtypes and categoricals for repeated strings before charting:
+# smaller frames and smaller typed-array payloads in the Plotly spec. Floats stay
+# float64 — they are money and costs, where float32 would show in hover text.
+def shrink_df(df):
+    import pandas as pd   # already loaded by whoever built df
+    for c in df.select_dtypes("integer"):
+        df[c] = pd.to_numeric(df[c], downcast="unsigned" if df[c].min() >= 0 else "integer")
+    for c in df.select_dtypes(["object", "string"]):
+        if df[c].nunique() < 0.5 * len(df): df[c] = df[c].astype("category")
+    return df
+
+# Setup banner is static apart from the feature label, so it is built once and %-filled.
+_AI_GATE_BANNER = """
+    <div style="background:#1a1a00;border:1px solid #f1c21b;border-left:4px solid #f1c21b;
+                padding:1.25rem 1.5rem;margin:1rem 0">
+        <div style="font-family:'IBM Plex Mono',monospace;font-size:0.7rem;letter-spacing:0.1em;
+                    color:#f1c21b;margin-bottom:0.5rem">
+            ⚡ %s — API KEY REQUIRED
+        </div>
+        <div style="font-family:'IBM Plex Sans',sans-serif;font-size:0.875rem;color:#c6c6c6;margin-bottom:0.25rem">
+            Enter your DeepSeek API key to unlock all AI features.
+            Get a free key at
+            <a href="https://platform.deepseek.com" target="_blank" style="color:#78a9ff">
+            platform.deepseek.com</a> → API Keys → Create.
+        </div>
+    </div>
+    """
+
+def ai_gate(label: str = "AI FEATURES") -> bool:
+    """
+    Render inline API-key setup when AI is not yet configured.
+    Returns True  → AI ready, caller may render AI buttons.
+    Returns False → setup panel shown, caller should skip AI buttons.
+    """
+    # Once this session has seen a key, the gate is one session_state lookup;
+    # save_ai_config keeps the flag in step with what it writes.
+    if st.session_state.get("_ai_ready"):
+        return True
+    cfg = get_ai_config()
+    if cfg and cfg.get("api_key"):
+        st.session_state["_ai_ready"] = True
+        return True
+
+    # Banner + form live in one placeholder so a successful activation can
+    # collapse them and hand back True in the same pass — no st.rerun().
+    panel = st.empty()
+    with panel.container():
+        st.markdown(_AI_GATE_BANNER % label, unsafe_allow_html=True)
+
+        form_key = "ai_gate_" + label.replace(" ", "_").replace("/", "_")
+        with st.form(form_key):
+            c1, c2 = st.columns([4, 1])
+            quick_key = c1.text_input(
+                "API Key", type="password",
+                placeholder="sk-xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx",
+                label_visibility="collapsed",
+            ).strip()
+            submitted = c2.form_submit_button("ACTIVATE", use_container_width=True)
+            if submitted:
+                if not quick_key:
+                    st.error("Paste your API key above.")
+                elif not quick_key.startswith("sk-"):
+                    st.error("Key must start with sk-")
+                else:
+                    with st.spinner("Testing connection..."):
+                        ok, msg = cached_test_api_key(quick_key, DEEPSEEK_URL)
+                    if ok:
+                        save_ai_config("deepseek", quick_key, "deepseek-chat",
+                                       DEEPSEEK_URL, MONTHLY_BUDGET, AI_FEATURES)
+                        panel.success("✅  AI activated — features unlocked.")
+                        return True
+                    else:
+                        st.error(f"Connection failed: {msg}")
+    return False
+
+# ── Sidebar brand ── title/version never change within a process, so built once at import.
+SIDEBAR_BRAND_HTML = f"""
+        <div style="padding:0.5rem 0">
+            <div style="font-family:'IBM Plex Mono',monospace;font-size:1rem;
+                        font-weight:600;color:#f4f4f4;letter-spacing:0.05em">
+                {APP_TITLE.upper()}
+            </div>
+            <div style="font-family:'IBM Plex Mono',monospace;font-size:0.65rem;
+                        color:#525252;letter-spacing:0.1em">v{APP_VERSION}</div>
+        </div>
+        <hr>"""
+
+def select_project():
+    projects = list_projects()
+    if not projects: return None, None
+    by_name = _projects_by_name(data_version())
+    key = "global_project_select"
+    if key not in st.session_state: st.session_state[key] = projects[0]["name"]
+    sel = st.sidebar.selectbox("▸ Active Project", by_name, key=key)
+    return by_name[sel], projects
@@ -0,0 +1,27 @@
+"""Page modules, imported on demand by the router in main.py."""
+
+# Nav labels and their (module, page function) targets, index-aligned. The nav
+# widget stores an int, so dispatch is a tuple index rather than a str-keyed
+# dict lookup. Lives here rather than in main.py because the entrypoint script
+# re-executes on every rerun, while this module is imported once per process.
+PAGE_LABELS = (
+    "DASHBOARD",
+    "⬡ AI ASSISTANT",
+    "SPRINT BOARD",
+    "RISK REGISTER",
+    "BUDGET",
+    "TEAM",
+    "PROJECTS",
+    "SETTINGS",
+)
+PAGE_TARGETS = (
+    ("views.dashboard",    "page_dashboard"),
+    ("views.ai_assistant", "page_ai_assistant"),
+    ("views.sprints",      "page_sprints"),
+    ("views.risks",        "page_risks"),
+    ("views.budget",       "page_budget"),
+    ("views.team",         "page_team"),
+    ("views.projects",     "page_projects"),
+    ("views.settings",     "page_settings"),
+)
+PAGE_COUNT = len(PAGE_LABELS)
@@ -0,0 +1,329 @@
+"""AI assistant page: the six AI feature cards."""
+import pandas as pd
+import streamlit as st
+
+from core import (data_version, get_ai_config, get_portfolio_summary, project_aggregates,
+    section_header, stream_ai_result)
+from views import PAGE_LABELS
+
+# ═════════════════════════════════════════════════════════════════════════════
+# PAGE: AI ASSISTANT
+# ═════════════════════════════════════════════════════════════════════════════
+# ── Card headers ── icon/title/desc are fixed, so the HTML is built once at import.
+# Cards with a live metric line are %-templates: only the numbers are substituted per rerun.
+# The leading <hr> is the divider under the feature selector, so it costs no extra element.
+def _ai_card(icon, title, desc, meta=""):
+    return f'''<hr style="margin:0.5rem 0 1rem 0"><div style="background:#1e2a3a;border:1px solid #0f62fe;border-top:3px solid #0f62fe;
+                         padding:0.75rem 1rem 0.4rem 1rem">
+                <span style="font-size:1.1rem">{icon}</span>
+                <strong style="font-family:IBM Plex Mono,monospace;font-size:0.88rem;
+                               color:#f4f4f4;margin-left:0.4rem">{title}</strong>
+                <div style="font-family:IBM Plex Sans,monospace;font-size:0.77rem;
+                            color:#a8a8a8;margin-top:0.3rem">{desc}</div>{meta}
+            </div>'''
+
+def _ai_card_meta(text):
+    return (f'<div style="font-family:IBM Plex Mono,monospace;font-size:0.72rem;'
+            f'color:#8d8d8d;margin-top:0.35rem">{text}</div>')
+
+_AI_CARD_HEALTH   = _ai_card("🧠", "PROJECT HEALTH ANALYSIS",
+                             "Score your project 1–10. Top 3 concerns + one action for this week.",
+                             _ai_card_meta("Morale %.0f/100  ·  Workload %.0f%%  ·  %d open risks  ·  Budget %.0f%% used"))
+_AI_CARD_SIM      = _ai_card("🎲", "WHAT-IF SIMULATOR",
+                             "Model the impact of changes on schedule, cost and risk before committing.")
+_AI_CARD_RETRO    = _ai_card("🔄", "SPRINT RETROSPECTIVE",
+                             "AI-facilitated retro: went well, improve, action items, pattern insight.")
+_AI_CARD_RISK     = _ai_card("⚠️", "RISK ANALYSIS",
+                             "Prioritised risk report with mitigations tailored to your chosen focus.")
+_AI_CARD_FORECAST = _ai_card("📅", "DELIVERY FORECAST",
+                             "Confidence-interval delivery dates based on your actual sprint velocity history.",
+                             _ai_card_meta("Remaining: %d pts  ·  Avg velocity: %.1f pts/sprint  ·  %d sprints done"))
+_AI_CARD_INSIGHTS = _ai_card("🔗", "CROSS-PROJECT INSIGHTS",
+                             "Compare two projects to surface lessons, patterns and resource opportunities.")
+
+# ── Risk focus ── label → (row mask over the risk frame, instruction); order = selectbox order.
+_RISK_FOCUS_DEFAULT = "Full risk register review"
+_RISK_FOCUS = {
+    _RISK_FOCUS_DEFAULT:
+        (None, "Full review. Overall posture (R/A/G), top 3 actions, systemic pattern, underestimated risk."),
+    "Critical risks only (score ≥ 12)":
+        (lambda df: df["score"] >= 12, "Critical risks only. For each: action required, owner, escalation needed?"),
+    **{label: (lambda df, c=cat: df["category"] == c,
+               f"{label} only. Assess landscape, top risk, gaps, actions this sprint.")
+       for label, cat in (("People & team risks","people"), ("Technical risks","technical"), ("Financial risks","financial"))},
+    "Next sprint risk forecast":
+        (lambda df: df["status"] == "open", "Which 2 risks will materialise next sprint? Early warnings + pre-emptive actions."),
+}
+
+# ── Prompt skeletons ── parsed once; a RUN click only fills in the numbers.
+_PROMPT_HEALTH = (
+    "Project health for '{name}'\n"
+    "Team: {team_n} people, morale {avg_morale:.0f}/100, workload {avg_workload:.0f}%\n"
+    "Open risks: {open_n}, velocity {avg_velocity:.1f} pts/sprint\n"
+    "Budget: {budget_pct:.1f}% used\n\n"
+    "Give:\n1. Health score 1-10 with rationale\n"
+    "2. Top 3 concerns in priority order\n"
+    "3. One immediate action the PM should take this week")
+_PROMPT_SIM = (
+    "What-if simulation for '{name}'\n"
+    "Team={team_n}, velocity={avg_velocity:.1f} pts/sprint, "
+    "remaining={remaining_pts} pts, budget left=${budget_left:,.0f}\n"
+    "Scenario: {scenario}\n\n"
+    "Give:\n1. Predicted outcome with probability (%)\n"
+    "2. Impact on delivery date (weeks earlier/later)\n"
+    "3. Impact on budget ($)\n"
+    "4. Top risk introduced by this change\n"
+    "5. Recommendation: proceed / caution / avoid")
+_PROMPT_RETRO = (
+    "Sprint retrospective for Sprint {number} of '{name}'\n"
+    "Goal: {goal}\n"
+    "Velocity: {completed}/{planned} pts ({completion_pct:.0f}% complete)\n"
+    "Blockers: {blockers}\n"
+    "Went well: {went_well}\n"
+    "To improve: {improve}\n\n"
+    "Structure as:\n**WENT WELL** (2-3 bullets)\n"
+    "**TO IMPROVE** (2-3 bullets)\n"
+    "**ACTION ITEMS** (3 specific tasks)\n"
+    "**PATTERN** (one insight about project trend)")
+_PROMPT_RISK = (
+    "Risk analysis for '{name}' — {focus}\n"
+    "Register: {total_n} total, {open_n} open\n"
+    "Analysing {filtered_n} risks:\n{risk_txt}\n\n{instr}")
+_PROMPT_FORECAST = (
+    "Delivery forecast for '{name}'\n"
+    "Remaining: {remaining_pts} pts, velocity history: {velocities}\n"
+    "Avg: {avg_velocity:.1f} pts/sprint (2-week sprints)\n"
+    "Target end date: {end_date}\n"
+    "Budget remaining: ${budget_left:,.0f}\n"
+    "Scenario: {scenario}\n\n"
+    "Give:\n1. Delivery date best/likely/worst case (80% CI)\n"
+    "2. Probability of hitting original target (%)\n"
+    "3. Sprints remaining\n"
+    "4. Budget at completion\n"
+    "5. Top factor that would change this forecast")
+_PROMPT_INSIGHTS = (
+    "Cross-project comparison. Focus: {focus}\n\n"
+    "Project A '{name}': team={team_n}, velocity={avg_velocity:.1f} pts/sprint, "
+    "budget used={budget_pct:.0f}%, open risks={open_n}\n"
+    "Project B '{b_name}': team={b_team_n}, velocity={b_velocity:.1f} pts/sprint, "
+    "budget=${b_budget:,.0f}, open risks={b_open_n}\n\n"
+    "Give:\n1. Which project is performing better and why\n"
+    "2. Most significant difference\n"
+    "3. Lesson the weaker project should adopt\n"
+    "4. Resource or process that could be shared")
+
+# Risk frame for the RISK card, built and sorted by score once per data version;
+# focus masks keep its order, so a RUN click only filters and formats.
+@st.cache_data(ttl=60, show_spinner=False)
+def _risk_frame(pid, version):
+    df = pd.DataFrame(project_aggregates(pid, version).risks)
+    return df.sort_values("score", ascending=False, kind="stable") if not df.empty else df
+
+def page_ai_assistant(project, projects):
+    pid = project["id"]
+    section_header("AI ASSISTANT", f"All AI features · {project['name']}")
+
+    # ── Data ──────────────────────────────────────────────────
+    cfg          = get_ai_config()
+    ai_ready     = bool(cfg and cfg.get("api_key"))
+    agg          = project_aggregates(pid, data_version(pid))
+    team, risks, completed_sp = agg.team, agg.risks, agg.completed_sp
+    avg_morale, avg_workload, avg_velocity = agg.avg_morale, agg.avg_workload, agg.avg_velocity
+    open_risks, total_expense, velocities  = agg.open_risks, agg.total_expense, agg.velocities
+    remaining_pts= project.get("total_points",0) - project.get("completed_points",0)
+    budget_left  = project["budget"] - total_expense
+    budget_pct   = total_expense/max(project["budget"],1)*100
+    p_ctx        = {k: project[k] for k in ("name","status","team_size","velocity","budget")}
+
+    # ── Setup banner ──────────────────────────────────────────
+    if not ai_ready:
+        st.warning("⚡ AI not configured. Go to **SETTINGS → 🔑 API CONFIG** to add your DeepSeek key.")
+        # Set in the callback: it runs before main() creates the main_nav selectbox.
+        st.button("→ GO TO SETTINGS", key="ai_goto_settings", use_container_width=True,
+                  on_click=lambda: st.session_state.update(main_nav=PAGE_LABELS.index("SETTINGS")))
+        st.markdown("---")
+
+    # ── Feature cards — each is a fragment, so its RUN button reruns only that
+    #    card; inputs sit in a form, so changing them reruns nothing until RUN ──
+    @st.fragment
+    def _health_card():
+        # ══════════════════════════════════════════
+        # 1. PROJECT HEALTH ANALYSIS
+        # ══════════════════════════════════════════
+        st.markdown(_AI_CARD_HEALTH % (avg_morale, avg_workload, len(open_risks), budget_pct),
+                    unsafe_allow_html=True)
+        with st.container(border=True):
+            run_health = st.button("▶  RUN HEALTH ANALYSIS", key="btn_health",
+                                   use_container_width=True, disabled=not ai_ready)
+        if run_health:
+            stream_ai_result(
+                "🧠 PROJECT HEALTH ANALYSIS",
+                _PROMPT_HEALTH.format_map(dict(
+                    name=project["name"], team_n=len(team), avg_morale=avg_morale,
+                    avg_workload=avg_workload, open_n=len(open_risks), avg_velocity=avg_velocity,
+                    budget_pct=budget_pct)),
+                "therapy", p_ctx)
+
+    @st.fragment
+    def _sim_card():
+        # ══════════════════════════════════════════
+        # 2. WHAT-IF SIMULATOR
+        # ══════════════════════════════════════════
+        st.markdown(_AI_CARD_SIM, unsafe_allow_html=True)
+        with st.container(border=True):
+            # The scenario picker stays outside the form: picking "Custom…" has
+            # to reveal the text input straight away.
+            sim_scenario = st.selectbox("Scenario", [
+                "Add 1 senior developer",
+                "Add 2 senior developers",
+                "Remove 1 team member (attrition)",
+                "Reduce scope by 20%",
+                "Reduce scope by 30%",
+                "Extend deadline by 4 weeks",
+                "Cut budget by 15%",
+                "Add contractor for 6 weeks",
+                "Custom…",
+            ], key="sim_scenario")
+            sim_custom = ""
+            with st.form("sim_form", border=False):
+                if sim_scenario == "Custom…":
+                    sim_custom = st.text_input("Describe your scenario",
+                                               placeholder="e.g. Swap frontend dev for a designer",
+                                               key="sim_custom")
+                run_sim = st.form_submit_button("▶  RUN SIMULATION",
+                                                use_container_width=True, disabled=not ai_ready)
+        if run_sim:
+            scenario = sim_custom if sim_scenario == "Custom…" else sim_scenario
+            stream_ai_result(
+                f"🎲 SIMULATION: {scenario}",
+                _PROMPT_SIM.format_map(dict(
+                    name=project["name"], team_n=len(team), avg_velocity=avg_velocity,
+                    remaining_pts=remaining_pts, budget_left=budget_left,
+                    scenario=scenario)),
+                "simulator", p_ctx)
+
+    @st.fragment
+    def _retro_card():
+        # ══════════════════════════════════════════
+        # 3. SPRINT RETROSPECTIVE
+        # ══════════════════════════════════════════
+        st.markdown(_AI_CARD_RETRO, unsafe_allow_html=True)
+        sprint_by_name = agg.sprint_by_name
+        retro_key = ""
+        with st.form("retro_form", border=True):
+            if sprint_by_name:
+                retro_key = st.selectbox("Select sprint", list(sprint_by_name), key="retro_sprint")
+            else:
+                st.caption("No completed sprints yet.")
+            run_retro = st.form_submit_button("▶  RUN RETROSPECTIVE",
+                                              use_container_width=True,
+                                              disabled=(not ai_ready or not sprint_by_name))
+        if run_retro and completed_sp:
+            sprint = sprint_by_name.get(retro_key, completed_sp[-1])
+            notes = sprint.get("retro_notes", {})
+            stream_ai_result(
+                f"🔄 RETROSPECTIVE — SPRINT {sprint['number']}",
+                _PROMPT_RETRO.format_map(dict(
+                    number=sprint["number"], name=project["name"], goal=sprint.get("goal","not set"),
+                    completed=sprint["completed_points"], planned=sprint["planned_points"],
+                    completion_pct=sprint["completion_pct"],
+                    blockers=", ".join(sprint["blockers"]) or "none",
+                    went_well=notes.get("went_well","none"), improve=notes.get("improve","none"))),
+                "retro", {"sprint": sprint["number"], "project": project["name"]})
+
+    @st.fragment
+    def _risk_card():
+        # ══════════════════════════════════════════
+        # 4. RISK ANALYSIS
+        # ══════════════════════════════════════════
+        st.markdown(_AI_CARD_RISK, unsafe_allow_html=True)
+        with st.form("risk_form", border=True):
+            if not risks:
+                st.caption("No risks yet — add some in the Risk Register page.")
+            risk_focus = st.selectbox("Focus area", list(_RISK_FOCUS), key="risk_focus")
+            run_risk_ai = st.form_submit_button("▶  RUN RISK ANALYSIS",
+                                                use_container_width=True,
+                                                disabled=(not ai_ready or not risks))
+        if run_risk_ai and risks:
+            risk_df = _risk_frame(pid, data_version(pid))
+            mask, instr = _RISK_FOCUS.get(risk_focus, _RISK_FOCUS[_RISK_FOCUS_DEFAULT])
+            filtered = risk_df[mask(risk_df)] if mask else risk_df
+            if filtered.empty:
+                filtered = risk_df
+            risk_txt = "\n".join(
+                f"- [{r.category.upper()}] {r.title} P={r.probability} I={r.impact} "
+                f"Score={r.score} {r.status.upper()} | {r.mitigation}"
+                for r in filtered.itertuples(index=False))
+            stream_ai_result(
+                f"⚠️ RISK: {risk_focus}",
+                _PROMPT_RISK.format_map(dict(
+                    name=project["name"], focus=risk_focus, total_n=len(risks), open_n=len(open_risks),
+                    filtered_n=len(filtered), risk_txt=risk_txt, instr=instr)),
+                "risk", {"project": project["name"], "focus": risk_focus})
+
+    @st.fragment
+    def _forecast_card():
+        # ══════════════════════════════════════════
+        # 5. DELIVERY FORECAST
+        # ══════════════════════════════════════════
+        st.markdown(_AI_CARD_FORECAST % (remaining_pts, avg_velocity, len(completed_sp)),
+                    unsafe_allow_html=True)
+        with st.form("forecast_form", border=True):
+            fc_scenario = st.selectbox("Scenario", [
+                "Current pace (no changes)",
+                "Add 1 developer next sprint",
+                "Reduce scope by 20%",
+                "Team velocity improves 10% (learning curve)",
+                "Velocity drops 15% (team fatigue)",
+            ], key="forecast_scenario")
+            run_forecast = st.form_submit_button("▶  RUN FORECAST",
+                                                 use_container_width=True, disabled=not ai_ready)
+        if run_forecast:
+            stream_ai_result(
+                f"📅 FORECAST: {fc_scenario}",
+                _PROMPT_FORECAST.format_map(dict(
+                    name=project["name"], remaining_pts=remaining_pts, velocities=velocities,
+                    avg_velocity=avg_velocity, end_date=project.get("end_date","not set"),
+                    budget_left=budget_left, scenario=fc_scenario)),
+                "forecast", p_ctx)
+
+    @st.fragment
+    def _insights_card():
+        # ══════════════════════════════════════════
+        # 6. CROSS-PROJECT INSIGHTS
+        # ══════════════════════════════════════════
+        st.markdown(_AI_CARD_INSIGHTS, unsafe_allow_html=True)
+        portfolio    = get_portfolio_summary(data_version())
+        has_multiple = len(portfolio) >= 2
+        with st.form("insights_form", border=True):
+            if not has_multiple:
+                st.caption("Create a second project to enable comparison.")
+            else:
+                compare_id = st.selectbox("Compare with", [i for i in portfolio if i != pid],
+                                          format_func=lambda i: portfolio[i]["name"], key="compare_proj")
+                focus = st.selectbox("Focus", [
+                    "Overall comparison",
+                    "Velocity & delivery performance",
+                    "Team & resource patterns",
+                    "Risk patterns",
+                    "Budget efficiency",
+                ], key="insights_focus")
+            run_insights = st.form_submit_button("▶  RUN COMPARISON",
+                                                 use_container_width=True,
+                                                 disabled=(not ai_ready or not has_multiple))
+        if run_insights and has_multiple:
+            proj_b, compare_to = portfolio[compare_id], portfolio[compare_id]["name"]
+            stream_ai_result(
+                f"🔗 {project['name']} vs {compare_to}",
+                _PROMPT_INSIGHTS.format_map(dict(
+                    focus=focus, name=project["name"], team_n=len(team), avg_velocity=avg_velocity,
+                    budget_pct=budget_pct, open_n=len(open_risks),
+                    b_name=proj_b["name"], b_team_n=proj_b["team_count"], b_velocity=proj_b["avg_velocity"],
+                    b_budget=proj_b["budget"], b_open_n=proj_b["open_risks"])),
+                "insights")
+
+    # ── All six cards, stacked; prompts are built and AI called only on RUN ──
+    for i, card in enumerate((_health_card, _sim_card, _retro_card,
+                              _risk_card, _forecast_card, _insights_card)):
+        if i: st.markdown("---")
+        card()
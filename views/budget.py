@@ -0,0 +1,148 @@
+"""Budget page: burn-down, breakdown, entry log and export."""
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from core import (data_version, db_exec_logged, df_to_csv, get_budget_summary,
+    load_project_bundle, new_id, plotly_theme, project_aggregates, section_header, shrink_df)
+
+# ═════════════════════════════════════════════════════════════════════════════
+# PAGE: BUDGET
+# ═════════════════════════════════════════════════════════════════════════════
+# Chart figures per (project, data version); see the chart-figures note in core.py.
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _burndown_fig(pid, version, budget):
+    entries = project_aggregates(pid, version).entries
+    if not entries: return None
+    # Only the plotted columns; entry_date is stored as YYYY-MM-DD, which numpy
+    # parses straight to datetime64 without pandas' per-string format inference.
+    df_b = shrink_df(pd.DataFrame({
+        "entry_date": np.array([e["entry_date"] for e in entries], dtype="datetime64[D]"),
+        "amount":     [e["amount"] for e in entries],
+        "entry_type": [e["entry_type"] for e in entries]}))
+    df_b = df_b.sort_values("entry_date")
+    df_b["signed"] = df_b["amount"].where(df_b["entry_type"]=="expense", -df_b["amount"])
+    df_b["cumulative"] = df_b["signed"].cumsum()
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=df_b["entry_date"],y=df_b["cumulative"],
+                             fill="tozeroy",fillcolor="rgba(15,98,254,0.12)",
+                             line=dict(color="#0f62fe",width=2.5),name="Cumulative spend",
+                             hovertemplate="<b>%{x|%b %d}</b><br>$%{y:,.0f}<extra></extra>"))
+    fig.add_hline(y=budget,line_color="#da1e28",line_dash="dash",
+                  annotation_text="BUDGET LIMIT",annotation_font_color="#da1e28",
+                  annotation_font_size=9,annotation_font_family="IBM Plex Mono")
+    fig.update_layout(title="CUMULATIVE SPEND vs BUDGET",**plotly_theme())
+    return fig
+
+# (pie figure, formatted table) for the breakdown tab, or None without expenses.
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _breakdown_view(pid, version):
+    agg = project_aggregates(pid, version)
+    if not agg.expenses: return None
+    # One groupby pass; sort=False keeps categories in first-seen order.
+    df_cat = (pd.DataFrame(agg.expenses, columns=["category","amount"])
+              .groupby("category", sort=False, as_index=False)["amount"].sum())
+    df_cat.columns = ["Category","Amount"]
+    fig = go.Figure(go.Pie(
+        labels=df_cat["Category"],values=df_cat["Amount"],
+        hole=0.5,
+        marker_colors=["#0f62fe","#42be65","#ff832b","#da1e28","#f1c21b","#8a3ffc"],
+        textfont=dict(family="IBM Plex Mono",size=10),
+        hovertemplate="<b>%{label}</b><br>$%{value:,.0f}<br>%{percent}<extra></extra>"
+    ))
+    fig.update_layout(title="SPEND BY CATEGORY",**plotly_theme(),showlegend=True)
+    total_expense = agg.total_expense
+    pct = df_cat["Amount"]/total_expense*100 if total_expense else 0.0*df_cat["Amount"]
+    table = df_cat.assign(**{"%": pct.map("{:.1f}%".format), "Amount": df_cat["Amount"].map("${:,.0f}".format)})
+    return fig, table
+
+@st.fragment
+def _budget_burndown_tab(pid, version, budget):
+    fig = _burndown_fig(pid, version, budget)
+    if fig: st.plotly_chart(fig,use_container_width=True)
+
+@st.fragment
+def _budget_breakdown_tab(pid, version):
+    view = _breakdown_view(pid, version)
+    if view:
+        fig2, df_cat = view
+        col1,col2 = st.columns(2)
+        with col1:
+            st.plotly_chart(fig2,use_container_width=True)
+        with col2:
+            st.dataframe(df_cat,use_container_width=True,hide_index=True)
+
+@st.fragment
+def _budget_entry_tab(pid):
+    with st.form("budget_entry_form"):
+        desc = st.text_input("Description *")
+        c1,c2,c3 = st.columns(3)
+        amount = c1.number_input("Amount ($)", 0.01, 10_000_000.0, 1000.0)
+        etype  = c2.selectbox("Type", ["expense","income"])
+        cat    = c3.selectbox("Category", ["infrastructure","people","tools","compliance","marketing","revenue","other"])
+        edate  = st.date_input("Date", value=date.today())
+        if st.form_submit_button("LOG ENTRY"):
+            if not desc.strip():
+                st.error("Description required.")
+            else:
+                db_exec_logged("INSERT INTO budget_entries (id,project_id,description,amount,entry_type,category,entry_date) VALUES (?,?,?,?,?,?,?)",
+                        (new_id(),pid,desc.strip(),amount,etype,cat,str(edate)),
+                        pid,"budget_entry",f"{etype}: ${amount:,.0f} — {desc}")
+                st.success("Entry logged!"); st.rerun()
+
+# Export table and its CSV bytes, built once per data version; None without entries.
+@st.cache_data(ttl=60, show_spinner=False)
+def _budget_export(pid, version):
+    entries = load_project_bundle(pid, version).entries
+    if not entries: return None
+    df_exp = pd.DataFrame({c: [e[c] for e in entries] for c in ("description","amount","entry_type","category","entry_date")})
+    return df_exp, df_to_csv(df_exp)
+
+@st.fragment
+def _budget_export_tab(pid, version):
+    export = _budget_export(pid, version)
+    if export:
+        df_exp, csv = export
+        st.dataframe(df_exp,use_container_width=True,hide_index=True)
+        st.download_button("↓ EXPORT BUDGET CSV", csv, "budget.csv", "text/csv")
+
+def page_budget(project, projects):
+    pid = project["id"]
+    # Metric totals are summed in SQL; full rows are only read by the tabs that list them.
+    version = data_version(pid)
+    totals = get_budget_summary(pid, version)
+    total_expense, total_income = totals.get("expense", 0.0), totals.get("income", 0.0)
+    section_header("BUDGET TRACKER", f"{project['name']}")
+
+    budget = project["budget"]
+    remaining = budget - total_expense + total_income
+    budget_pct = total_expense/budget*100 if budget else 0
+
+    c1,c2 = st.columns(2)
+    c1.metric("TOTAL BUDGET",  f"${budget:,.0f}")
+    c2.metric("TOTAL SPEND",   f"${total_expense:,.0f}", f"{budget_pct:.1f}% used",
+              delta_color="inverse" if budget_pct>90 else "off")
+    c3,c4 = st.columns(2)
+    c3.metric("INCOME",        f"${total_income:,.0f}")
+    c4.metric("NET REMAINING", f"${remaining:,.0f}",
+              delta_color="inverse" if remaining<0 else "normal")
+
+    pct_clamped = min(100,budget_pct)
+    bar_color = "#da1e28" if budget_pct>90 else "#ff832b" if budget_pct>75 else "#0f62fe"
+    st.markdown(f"""
+    <div style="margin:1rem 0">
+        <div style="font-family:'IBM Plex Mono',monospace;font-size:0.72rem;color:#a8a8a8;margin-bottom:4px">BUDGET UTILISATION — {budget_pct:.1f}%</div>
+        <div style="background:#393939;height:8px">
+            <div style="background:{bar_color};height:8px;width:{pct_clamped}%;transition:width 0.5s"></div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+
+    tabs = st.tabs(["BURN-DOWN","BREAKDOWN","LOG ENTRY","EXPORT"])
+    with tabs[0]: _budget_burndown_tab(pid, version, budget)
+    with tabs[1]: _budget_breakdown_tab(pid, version)
+    with tabs[2]: _budget_entry_tab(pid)
+    with tabs[3]: _budget_export_tab(pid, version)
@@ -0,0 +1,226 @@
+"""Dashboard page: portfolio KPIs, charts and AI quick insights."""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from core import (MONTHLY_BUDGET, ai_gate, cached_call_ai_many, data_version, get_ai_config,
+    get_monthly_cost, plotly_theme, priority_tag, project_aggregates, render_ai_result,
+    risk_matrix, section_header, shrink_df, status_tag, stream_ai_result)
+
+# ═════════════════════════════════════════════════════════════════════════════
+# PAGE: DASHBOARD
+# ═════════════════════════════════════════════════════════════════════════════
+# Quick-analysis prompts: fixed text lives here, only the numbers are filled per click.
+_PROMPT_HEALTH = (
+    "Analyse health of '{name}'. Morale:{avg_morale:.1f}/100, "
+    "Workload:{avg_workload:.1f}%, Team:{team_n}, Open risks:{open_n}, "
+    "Budget used:{budget_pct:.0f}%.\n"
+    "Give: 1) Health score 1-10 with rationale  2) Top 3 concerns ranked  3) Immediate action")
+_PROMPT_SIM = (
+    "Forecast delivery for '{name}'. Avg velocity:{avg_velocity:.1f} pts/sprint, "
+    "Remaining:{remaining_pts} points, Team:{team_n}, Budget remaining:${budget_left:,.0f}.\n"
+    "Give: 1) Expected delivery date range  2) Probability of on-time delivery  3) Top schedule risk")
+_PROMPT_RISK = (
+    "Analyse risks for '{name}'. Current risks:\n{risk_txt}\n"
+    "Give: 1) Critical risks to address now  2) Emerging patterns  3) Recommended mitigations")
+
+# Chart figures per (project, data version); see the chart-figures note in core.py.
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _velocity_fig(pid, version):
+    agg = project_aggregates(pid, version)
+    sprints = agg.sprints
+    df_vel = shrink_df(pd.DataFrame({
+        "Sprint":    [f"S{s['number']}" for s in sprints],
+        "Planned":   [s["planned_points"] for s in sprints],
+        "Completed": [s["completed_points"] for s in sprints],
+        "Status":    [s["status"] for s in sprints]
+    }))
+    fig = go.Figure()
+    fig.add_trace(go.Bar(name="Planned", x=df_vel["Sprint"], y=df_vel["Planned"],
+                         marker_color="#393939", marker_line_color="#525252", marker_line_width=1))
+    fig.add_trace(go.Bar(name="Completed", x=df_vel["Sprint"], y=df_vel["Completed"],
+                         marker_color="#0f62fe"))
+    # Velocity trend line
+    if len(agg.completed_sp) > 1:
+        comp_data = df_vel[df_vel["Status"]=="completed"]
+        fig.add_trace(go.Scatter(name="Velocity trend", x=comp_data["Sprint"], y=comp_data["Completed"],
+                                 mode="lines+markers", line=dict(color="#42be65",width=2,dash="dot"),
+                                 marker=dict(size=6,color="#42be65")))
+    fig.update_layout(title="SPRINT VELOCITY", barmode="overlay", **plotly_theme())
+    return fig
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _risk_heatmap_fig(pid, version):
+    # Cell counts come pre-grouped from SQL; one scatter-add places them.
+    cells = risk_matrix(pid, version)
+    z = np.zeros((5,5), dtype=int)
+    if cells:
+        p, i = np.array(list(cells), dtype=int).T
+        np.add.at(z, (np.clip(p,1,5)-1, np.clip(i,1,5)-1), [len(t) for t in cells.values()])
+    colorscale = [[0,"#1e1e1e"],[0.01,"#262626"],[0.3,"#f1c21b"],[0.6,"#ff832b"],[1.0,"#da1e28"]]
+    fig = go.Figure(go.Heatmap(
+        z=z.tolist(), x=["1-Negligible","2-Minor","3-Moderate","4-Major","5-Catastrophic"],
+        y=["1-Rare","2-Unlikely","3-Possible","4-Likely","5-Almost Certain"],
+        colorscale=colorscale, showscale=False,
+        text=np.where(z>0, z.astype(str), "").tolist(),
+        texttemplate="%{text}", textfont=dict(size=14,color="white",family="IBM Plex Mono")
+    ))
+    fig.update_layout(title="RISK MATRIX", **plotly_theme())
+    fig.update_xaxes(tickfont=dict(size=9))
+    fig.update_yaxes(tickfont=dict(size=9))
+    return fig
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _burn_fig(pid, version, budget):
+    budget_entries = project_aggregates(pid, version).entries
+    # Plotted columns only, ISO dates parsed by numpy in one pass.
+    df_b = shrink_df(pd.DataFrame({
+        "entry_date": np.array([e["entry_date"] for e in budget_entries], dtype="datetime64[D]"),
+        "amount":     [e["amount"] for e in budget_entries],
+        "entry_type": [e["entry_type"] for e in budget_entries]}))
+    df_b = df_b.sort_values("entry_date")
+    df_b["cumulative"] = df_b["amount"].where(df_b["entry_type"]=="expense", -df_b["amount"]).cumsum()
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=df_b["entry_date"], y=df_b["cumulative"],
+        fill="tozeroy", fillcolor="rgba(15,98,254,0.15)",
+        line=dict(color="#0f62fe",width=2), name="Spend"
+    ))
+    fig.add_hline(y=budget, line_color="#da1e28", line_dash="dash",
+                   annotation_text="BUDGET LIMIT", annotation_font_color="#da1e28",
+                   annotation_font_family="IBM Plex Mono", annotation_font_size=10)
+    fig.update_layout(title="BUDGET BURN", showlegend=False, **plotly_theme())
+    return fig
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _team_health_fig(pid, version):
+    team = project_aggregates(pid, version).team
+    fig = go.Figure()
+    names = [m["name"].split()[0] for m in team]
+    workloads = [m["workload"] for m in team]
+    morales = [m["morale"] for m in team]
+    fig.add_trace(go.Bar(name="Workload", x=names, y=workloads,
+                          marker_color="#ff832b", marker_line_width=0))
+    fig.add_trace(go.Bar(name="Morale", x=names, y=morales,
+                          marker_color="#42be65", marker_line_width=0))
+    fig.add_hline(y=85, line_color="#da1e28", line_dash="dash",
+                   annotation_text="OVERLOAD", annotation_font_color="#da1e28",
+                   annotation_font_size=9, annotation_font_family="IBM Plex Mono")
+    fig.update_layout(title="TEAM HEALTH", barmode="group", **plotly_theme())
+    return fig
+
+def page_dashboard(project, projects):
+    pid = project["id"]
+    # KPIs come from the per-version aggregate pass, not a fresh loop per rerun;
+    # the cached defaults (used by prompts) are swapped for 0 on empty data.
+    version = data_version(pid)
+    agg = project_aggregates(pid, version)
+    team, sprints, risks, budget_entries = agg.team, agg.sprints, agg.risks, agg.entries
+    monthly_cost = get_monthly_cost()
+    cfg = get_ai_config()
+    budget = cfg["monthly_budget"] if cfg else MONTHLY_BUDGET
+
+    avg_morale   = agg.avg_morale   if team else 0
+    avg_workload = agg.avg_workload if team else 0
+    avg_velocity = agg.avg_velocity if agg.velocities else 0
+    open_risks   = len(agg.open_risks)
+    total_expense = agg.total_expense
+    budget_pct    = total_expense/project["budget"]*100 if project["budget"] else 0
+
+    # Header
+    section_header("COMMAND CENTER", f"{project['name']}  ·  {project['status'].upper()}")
+    st.markdown(
+        status_tag(project["status"]) + "  " + priority_tag(project.get("priority","medium")),
+        unsafe_allow_html=True
+    )
+    st.markdown("")
+
+    # KPI row — 3 cols on mobile, 6 on desktop via two rows
+    c1,c2,c3 = st.columns(3)
+    c1.metric("VELOCITY",     f"{avg_velocity:.0f} pts", "Sprint avg")
+    c2.metric("MORALE",       f"{avg_morale:.0f}/100",   f"{'↑ Good' if avg_morale>70 else '↓ Risk'}")
+    c3.metric("WORKLOAD",     f"{avg_workload:.0f}%",    f"{'↑ High' if avg_workload>85 else 'OK'}",
+              delta_color="inverse" if avg_workload>85 else "normal")
+    c4,c5,c6 = st.columns(3)
+    c4.metric("OPEN RISKS",   str(open_risks),           f"{'⚠ Review' if open_risks>3 else 'OK'}",
+              delta_color="inverse" if open_risks>3 else "off")
+    c5.metric("BUDGET",       f"{budget_pct:.0f}%",      f"${total_expense:,.0f} used")
+    c6.metric("AI SPEND",     f"${monthly_cost:.4f}",    f"${budget-monthly_cost:.2f} left")
+
+    st.markdown("---")
+
+    # ── Charts row 1 ──────────────────────────────────────────
+    col_l, col_r = st.columns([3,2])
+
+    with col_l:
+        if sprints:
+            st.plotly_chart(_velocity_fig(pid, version), use_container_width=True)
+        else:
+            st.info("No sprint data.")
+
+    with col_r:
+        # Risk matrix heatmap
+        if risks:
+            st.plotly_chart(_risk_heatmap_fig(pid, version), use_container_width=True)
+
+    # ── Charts row 2 ──────────────────────────────────────────
+    col_a, col_b = st.columns(2)
+
+    with col_a:
+        # Budget burn-down
+        if budget_entries:
+            st.plotly_chart(_burn_fig(pid, version, project["budget"]), use_container_width=True)
+
+    with col_b:
+        # Team workload radar
+        if team:
+            st.plotly_chart(_team_health_fig(pid, version), use_container_width=True)
+
+    # ── AI Quick Actions ──────────────────────────────────────
+    st.markdown("---")
+    st.markdown('<div class="mono-label">AI ANALYSIS</div>', unsafe_allow_html=True)
+
+    p_ctx = {k: project[k] for k in ("name","status","team_size","velocity","budget")}
+
+    if ai_gate("DASHBOARD AI ANALYSIS"):
+        run_health = st.button("▶  HEALTH ANALYSIS",   use_container_width=True, key="dash_health")
+        run_sim    = st.button("▶  SCENARIO FORECAST", use_container_width=True, key="dash_sim")
+        run_risk   = st.button("▶  RISK ANALYSIS",     use_container_width=True, key="dash_risk")
+        # Only one button fires per rerun, so overlapping the three calls needs
+        # its own action; RUN ALL is the one UI addition of the concurrent path.
+        run_all    = st.button("▶  RUN ALL",           use_container_width=True, key="dash_all")
+
+        # (header, prompt, feature, context) per requested analysis
+        jobs = []
+        if run_health or run_all:
+            ts = {"avg_morale":avg_morale,"avg_workload":avg_workload,"count":len(team)}
+            prompt = _PROMPT_HEALTH.format_map(dict(
+                name=project["name"], avg_morale=avg_morale, avg_workload=avg_workload,
+                team_n=len(team), open_n=open_risks, budget_pct=budget_pct))
+            jobs.append(("HEALTH ANALYSIS",prompt,"therapy",{"project":p_ctx,"team":ts}))
+
+        if run_sim or run_all:
+            remaining_pts = project.get("total_points",0) - project.get("completed_points",0)
+            prompt = _PROMPT_SIM.format_map(dict(
+                name=project["name"], avg_velocity=avg_velocity, remaining_pts=remaining_pts,
+                team_n=len(team), budget_left=project["budget"]-total_expense))
+            jobs.append(("DELIVERY FORECAST",prompt,"forecast",p_ctx))
+
+        if run_risk or run_all:
+            risk_summary = [{"title":r["title"],"score":r["score"],"status":r["status"]} for r in risks]
+            prompt = _PROMPT_RISK.format_map(dict(
+                name=project["name"],
+                risk_txt="\n".join(f"- {r['title']} (score:{r['score']}, {r['status']})" for r in risk_summary)))
+            jobs.append(("RISK ANALYSIS",prompt,"risk",{"risks":risk_summary,"project":p_ctx}))
+
+        if len(jobs) == 1:
+            stream_ai_result(*jobs[0])
+        elif jobs:
+            # RUN ALL: the three calls overlap; each result fills its own slot
+            # (fixed order on the page) as soon as it arrives.
+            slots = [st.empty() for _ in jobs]
+            with st.spinner("Running all analyses..."):
+                for i, resp in cached_call_ai_many([j[1:] for j in jobs]):
+                    with slots[i].container():
+                        render_ai_result(resp, jobs[i][0])
@@ -0,0 +1,100 @@
+"""Projects page: portfolio table, project creation and activity log."""
+from datetime import date, timedelta
+
+import pandas as pd
+import streamlit as st
+
+from core import (HISTORY_PAGE, ai_gate, bump_data_version, db_exec, get_project_history,
+    new_id, section_header, stream_ai_result)
+
+# ═════════════════════════════════════════════════════════════════════════════
+# PAGE: PROJECTS
+# ═════════════════════════════════════════════════════════════════════════════
+# Activity feed icon per event type; anything else gets a bullet.
+_EVENT_ICON = {"sprint_created":"🏃","sprint_updated":"✏️","risk_added":"⚠️","member_added":"👤",
+               "member_removed":"👤","budget_entry":"💰","status_change":"🔄","project_created":"🆕"}
+
+# Each tab body is a fragment: widgets inside one tab rerun only that tab.
+@st.fragment
+def _projects_portfolio_tab(projects):
+    if not projects:
+        st.info("No projects. Create one.")
+    else:
+        df = pd.DataFrame({
+            "Name":[p["name"] for p in projects],"Status":[p["status"].upper() for p in projects],
+            "Priority":[p.get("priority","medium").upper() for p in projects],
+            "Team":[p["team_size"] for p in projects],"Velocity":[f"{p['velocity']:.1f}" for p in projects],
+            "Budget":[f"${p['budget']:,.0f}" for p in projects],
+            "Start":[p.get("start_date","—") for p in projects],"End":[p.get("end_date","—") for p in projects]
+        })
+        st.dataframe(df,use_container_width=True,hide_index=True)
+
+        if len(projects)>1:
+            if ai_gate("PORTFOLIO AI ANALYSIS"):
+                if st.button("AI PORTFOLIO COMPARE"):
+                    plist = "\n".join(f"- {p['name']}: {p['status']}, vel={p['velocity']:.1f}, budget=${p['budget']:,.0f}" for p in projects[:4])
+                    prompt = f"Compare this portfolio:\n{plist}\n\nGive: 1) Healthiest project  2) Most at-risk  3) Resource allocation recommendation  4) Portfolio-level risk"
+                    stream_ai_result("PORTFOLIO ANALYSIS", prompt, "insights", {"projects":[{"name":p["name"],"status":p["status"]} for p in projects]})
+
+@st.fragment
+def _projects_create_tab():
+    with st.form("create_project_form"):
+        name = st.text_input("Project Name *")
+        desc = st.text_area("Description")
+        c1,c2,c3 = st.columns(3)
+        status   = c1.selectbox("Status",   ["planning","active","on_hold","completed"])
+        priority = c2.selectbox("Priority",  ["critical","high","medium","low"])
+        c4,c5 = st.columns(2)
+        start = c4.date_input("Start Date")
+        end   = c5.date_input("End Date", value=date.today()+timedelta(days=90))
+        c6,c7,c8 = st.columns(3)
+        ts  = c6.number_input("Team Size", 1,200,4)
+        vel = c7.number_input("Est. Velocity (pts)", 1.0,500.0,30.0)
+        bg  = c8.number_input("Budget ($)", 0.0,100_000_000.0,50_000.0,step=5000.0)
+        total_pts = st.number_input("Total Story Points (backlog)", 0, 10000, 0)
+        if st.form_submit_button("CREATE PROJECT"):
+            if not name.strip():
+                st.error("Name required.")
+            else:
+                new_pid = new_id()
+                db_exec("INSERT INTO projects (id,name,description,status,priority,start_date,end_date,team_size,velocity,budget,total_points) VALUES (?,?,?,?,?,?,?,?,?,?,?)",
+                        (new_pid,name.strip(),desc,status,priority,str(start),str(end),ts,vel,bg,total_pts))
+                bump_data_version(new_pid)
+                st.success(f"'{name}' created!"); st.rerun()
+
+@st.fragment
+def _projects_activity_tab(pid):
+    # Page 1 plus however many older pages were requested, each a keyset seek.
+    pages = st.session_state.setdefault("_hist_pages", {})
+    history = get_project_history(pid)
+    for _ in range(pages.get(pid, 1) - 1):
+        if len(history) % HISTORY_PAGE: break
+        history += get_project_history(pid, before_id=history[-1]["id"])
+    if history:
+        rows = []
+        for h in history:
+            icon = _EVENT_ICON.get(h["event_type"],"•")
+            rows.append(f"""
+            <div style="display:flex;gap:12px;padding:8px 0;border-bottom:1px solid #2a2a2a">
+                <span style="font-size:1rem">{icon}</span>
+                <div>
+                    <span style="font-family:'IBM Plex Mono',monospace;font-size:0.78rem;color:#f4f4f4">{h['event_type'].replace('_',' ').upper()}</span>
+                    <span style="font-family:'IBM Plex Mono',monospace;font-size:0.75rem;color:#a8a8a8;margin-left:8px">{h.get('detail','')}</span><br>
+                    <span style="font-family:'IBM Plex Mono',monospace;font-size:0.7rem;color:#525252">{h['created_at']}</span>
+                </div>
+            </div>
+            """)
+        st.markdown("".join(rows), unsafe_allow_html=True)
+        if len(history) % HISTORY_PAGE == 0:
+            st.button("LOAD OLDER", key="hist_more", use_container_width=True,
+                      on_click=lambda: pages.__setitem__(pid, pages.get(pid, 1) + 1))
+    else:
+        st.info("No activity yet.")
+
+def page_projects(project, projects):
+    section_header("PROJECTS","Portfolio overview")
+
+    tabs = st.tabs(["PORTFOLIO","➕ CREATE","ACTIVITY"])
+    with tabs[0]: _projects_portfolio_tab(projects)
+    with tabs[1]: _projects_create_tab()
+    with tabs[2]: _projects_activity_tab(project["id"])
@@ -0,0 +1,150 @@
+"""Risk register page: register, matrix, entry form and AI review."""
+
+import pandas as pd
+import streamlit as st
+
+from core import (RISK_LEVELS, ai_gate, data_version, db_exec_logged, df_to_csv,
+    get_risk_summary, load_project_bundle, new_id, risk_matrix, risk_score_tag, section_header,
+    stream_ai_result, tag)
+
+# ═════════════════════════════════════════════════════════════════════════════
+# PAGE: RISK REGISTER
+# ═════════════════════════════════════════════════════════════════════════════
+# Register CSV, serialized once per data version rather than on every rerun.
+# Built column-wise: one list per column, no intermediate dict per row.
+@st.cache_data(ttl=60, show_spinner=False)
+def _risk_register_csv(pid, version):
+    risks = load_project_bundle(pid, version).risks
+    return df_to_csv(pd.DataFrame({
+        "Title":[r["title"] for r in risks],"Category":[r["category"] for r in risks],
+        "Probability":[r["probability"] for r in risks],"Impact":[r["impact"] for r in risks],
+        "Score":[r["score"] for r in risks],"Status":[r["status"] for r in risks],
+        "Owner":[r.get("owner","") for r in risks],"Mitigation":[r.get("mitigation","") for r in risks]
+    }))
+
+# Card markup per risk, rendered once per data version as (status, html) in
+# register order; the status filter then only selects and joins.
+@st.cache_data(ttl=60, show_spinner=False)
+def _risk_cards(pid, version):
+    cards = []
+    for r in load_project_bundle(pid, version).risks:
+        score = r["score"]
+        border = RISK_LEVELS[score][2]
+        cards.append((r["status"], f"""
+        <div style="background:#262626;border:1px solid #393939;border-left:4px solid {border};padding:1rem;margin-bottom:0.75rem">
+            <div style="display:flex;justify-content:space-between;align-items:flex-start">
+                <div>
+                    <span style="font-family:'IBM Plex Mono',monospace;font-weight:600;color:#f4f4f4">{r['title']}</span>
+                    <span style="margin-left:12px">{risk_score_tag(r['probability'],r['impact'])}</span>
+                    {tag(r['category'].upper(),'blue')}
+                    {tag(r['status'].upper(),'green' if r['status']=='closed' else 'yellow' if r['status']=='mitigated' else 'red')}
+                </div>
+                <span style="font-family:'IBM Plex Mono',monospace;font-size:0.78rem;color:#a8a8a8">Owner: {r.get('owner','—')}</span>
+            </div>
+            <p style="color:#a8a8a8;font-size:0.85rem;margin:0.5rem 0">{r.get('description','')}</p>
+            <div style="font-family:'IBM Plex Mono',monospace;font-size:0.78rem;color:#42be65">
+                ▶ Mitigation: {r.get('mitigation','—')}
+            </div>
+        </div>
+        """))
+    return cards
+
+# Each tab body is a fragment: widgets inside one tab rerun only that tab.
+@st.fragment
+def _risks_register_tab(pid, version, risks):
+    filter_status = st.multiselect("Filter by status", ["open","mitigated","closed"], default=["open","mitigated"])
+
+    # All cards go out as one markdown element rather than one per risk.
+    cards = [html for status, html in _risk_cards(pid, version) if not filter_status or status in filter_status]
+    if cards: st.markdown("".join(cards), unsafe_allow_html=True)
+
+    if risks:
+        csv = _risk_register_csv(pid, version)
+        st.download_button("↓ EXPORT RISK REGISTER CSV", csv, "risks.csv", "text/csv")
+
+# Matrix markup that never changes — header row, row labels and each cell's
+# opening tag (colours fixed by prob × impact) — built once at import, so a
+# render only joins in the risk titles.
+_MATRIX_HEAD = ('<tr><th style="font-family:IBM Plex Mono,monospace;font-size:0.7rem;color:#a8a8a8;padding:4px">P / I</th>'
+                + "".join(f'<th style="font-family:IBM Plex Mono,monospace;font-size:0.7rem;color:#a8a8a8;padding:4px 8px">{l}</th>'
+                          for l in ("1\nNegligible","2\nMinor","3\nModerate","4\nMajor","5\nCatastrophic"))
+                + "</tr>")
+_MATRIX_ROWS = tuple(
+    (prob, f'<tr><td style="font-family:IBM Plex Mono,monospace;font-size:0.7rem;color:#a8a8a8;padding:4px 8px">{prob}</td>',
+     tuple((impact, f'<td style="background:{RISK_LEVELS[prob*impact][3]};border:1px solid {RISK_LEVELS[prob*impact][2]};'
+                     'padding:8px;min-width:100px;vertical-align:top;font-family:IBM Plex Mono,monospace">')
+           for impact in range(1,6)))
+    for prob in range(5,0,-1))
+_MATRIX_TITLE = '<span style="color:#f4f4f4;font-size:0.7rem">%s</span>'
+
+@st.fragment
+def _risks_matrix_tab(pid):
+    st.markdown('<div class="mono-label">RISK PROBABILITY × IMPACT MATRIX</div>', unsafe_allow_html=True)
+    grid = risk_matrix(pid, data_version(pid))
+    rows_html = "".join(
+        row_open + "".join(td_open + "<br>".join(_MATRIX_TITLE % t for t in grid.get((prob,impact),()))
+                           + "&nbsp;</td>" for impact, td_open in cells) + "</tr>"
+        for prob, row_open, cells in _MATRIX_ROWS)
+    st.markdown(f'<table style="border-collapse:collapse;width:100%"><thead>{_MATRIX_HEAD}</thead><tbody>{rows_html}</tbody></table>', unsafe_allow_html=True)
+
+@st.fragment
+def _risks_add_tab(pid):
+    team = load_project_bundle(pid, data_version(pid)).team
+    team_names = [m["name"] for m in team] + ["External"]
+    with st.form("add_risk_form"):
+        title = st.text_input("Risk Title *")
+        desc  = st.text_area("Description")
+        c1,c2,c3 = st.columns(3)
+        cat    = c1.selectbox("Category", ["technical","people","financial","compliance","delivery","external"])
+        prob   = c2.slider("Probability (1-5)", 1, 5, 2)
+        impact = c3.slider("Impact (1-5)", 1, 5, 2)
+        c4,c5 = st.columns(2)
+        owner  = c4.selectbox("Risk Owner", team_names)
+        status = c5.selectbox("Status", ["open","mitigated","closed"])
+        mitigation = st.text_area("Mitigation Plan")
+        score = prob*impact
+        st.markdown(f"Risk Score: {risk_score_tag(prob,impact)}", unsafe_allow_html=True)
+        if st.form_submit_button("ADD RISK"):
+            if not title.strip():
+                st.error("Title required.")
+            else:
+                db_exec_logged("INSERT INTO risks (id,project_id,title,description,category,probability,impact,status,owner,mitigation) VALUES (?,?,?,?,?,?,?,?,?,?)",
+                        (new_id(),pid,title.strip(),desc,cat,prob,impact,status,owner,mitigation),
+                        pid,"risk_added",f"{title} (score:{score})")
+                st.success("Risk added!"); st.rerun()
+
+@st.fragment
+def _risks_ai_tab(project, risks, open_n, critical_n):
+    if ai_gate("RISK AI ANALYSIS"):
+        if st.button("GENERATE AI RISK ANALYSIS"):
+            risk_data = [{"title":r["title"],"score":r["score"],"category":r["category"],"status":r["status"]} for r in risks]
+            prompt = (f"Comprehensive risk analysis for '{project['name']}'.\n"
+                      f"Open risks: {open_n}, Critical (score≥12): {critical_n}\n"
+                      "Risks:\n" + "\n".join(f"- {r['title']} | {r['category']} | score:{r['score']} | {r['status']}" for r in risk_data)
+                      + "\nProvide: 1) Top 3 immediate risks requiring action  "
+                      "2) Risk pattern analysis  3) Specific mitigations for highest risks  "
+                      "4) Risk forecast for next sprint")
+            stream_ai_result("AI RISK ANALYSIS", prompt, "risk", {"project":project["name"],"risks":risk_data})
+
+def page_risks(project, projects):
+    pid = project["id"]
+    version = data_version(pid)
+    risks = load_project_bundle(pid, version).risks
+    section_header("RISK REGISTER", f"{project['name']}")
+
+    # Summary bar — counts come from one GROUP BY, not from filtering the rows.
+    summary = get_risk_summary(pid, version)
+    open_n, critical_n = summary.get("open", (0, 0))
+
+    c1,c2 = st.columns(2)
+    c1.metric("TOTAL RISKS", sum(n for n, _ in summary.values()))
+    c2.metric("OPEN", open_n, delta=f"{critical_n} critical", delta_color="inverse" if critical_n else "off")
+    c3,c4 = st.columns(2)
+    c3.metric("MITIGATED", summary.get("mitigated", (0, 0))[0])
+    c4.metric("CLOSED", summary.get("closed", (0, 0))[0])
+
+    tabs = st.tabs(["REGISTER","MATRIX","ADD RISK","🤖 AI"])
+    with tabs[0]: _risks_register_tab(pid, version, risks)
+    with tabs[1]: _risks_matrix_tab(pid)
+    with tabs[2]: _risks_add_tab(pid)
+    with tabs[3]: _risks_ai_tab(project, risks, open_n, critical_n)
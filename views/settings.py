@@ -0,0 +1,270 @@
+"""Settings page: AI configuration, usage analytics and data management."""
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from core import (CRYPTO_AVAILABLE, DEEPSEEK_URL, MONTHLY_BUDGET, bump_data_version,
+    cache_hit_stats, data_version, db_exec, db_one, db_rows_raw, get_ai_config,
+    get_monthly_cost, load_project_bundle, mask_key, page_timings, plotly_theme, project_csv,
+    save_ai_config, section_header, test_api_key)
+
+# Key hint, with the missing-cryptography warning folded in when it applies, so
+# the API CONFIG section opens with one alert element instead of two.
+_KEY_HINT = ("Get a free key at [platform.deepseek.com](https://platform.deepseek.com) "
+             "→ sign up → API Keys → Create key.")
+if not CRYPTO_AVAILABLE:
+    _KEY_HINT = ("⚠  `cryptography` not installed — keys stored unencrypted.\n`pip install cryptography`"
+                 "\n\n" + _KEY_HINT)
+
+# AI features that can be switched on or off, with their display labels.
+_FEATURE_LABELS = {
+    "therapy":   "Health Analysis",
+    "simulator": "What-If Simulator",
+    "insights":  "Portfolio Insights",
+    "retro":     "Retrospective",
+    "risk":      "Risk Analysis",
+    "forecast":  "Delivery Forecast",
+}
+
+# USAGE figures cover the latest 100 calls; SQLite aggregates them in place and
+# only the totals, the groups and the 30 listed rows come back.
+_RECENT_USAGE = "(SELECT feature, cost_usd, success, created_at FROM ai_usage_log ORDER BY created_at DESC LIMIT 100)"
+
+# USAGE charts keyed on their grouped rows (a handful of small tuples), so an
+# unchanged breakdown reuses its figure instead of rebuilding it through plotly express.
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _feature_cost_fig(by_feat):
+    fig = px.pie(
+        pd.DataFrame.from_records(by_feat, columns=["feature","cost_usd"]),
+        values="cost_usd", names="feature",
+        title="COST BY FEATURE", hole=0.5,
+        color_discrete_sequence=[
+            "#0f62fe","#42be65","#ff832b","#f1c21b","#da1e28","#8a3ffc"],
+    )
+    fig.update_layout(**plotly_theme())
+    return fig
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _daily_cost_fig(daily):
+    fig = px.bar(pd.DataFrame.from_records(daily, columns=["created_at","cost_usd"]),
+                 x="created_at", y="cost_usd",
+                 title="DAILY AI COST",
+                 color_discrete_sequence=["#0f62fe"])
+    fig.update_layout(**plotly_theme(), xaxis_title="", yaxis_title="USD")
+    return fig
+
+# ═════════════════════════════════════════════════════════════════════════════
+# PAGE: SETTINGS
+# ═════════════════════════════════════════════════════════════════════════════
+def page_settings(project, projects):
+    section_header("SETTINGS", "AI configuration & system")
+
+    cfg          = get_ai_config()
+    monthly_cost = get_monthly_cost()
+    budget       = cfg["monthly_budget"] if cfg else MONTHLY_BUDGET
+    budget_pct   = min(100.0, monthly_cost / budget * 100) if budget else 0
+    has_key      = bool(cfg and cfg.get("api_key"))
+
+    # ── Section selector — radio always renders on mobile, tabs often don't ──
+    section = st.radio(
+        "Section",
+        ["🔑  API CONFIG", "📊  USAGE", "💾  DATA"],
+        horizontal=True,
+        label_visibility="collapsed",
+        key="settings_section",
+    )
+    st.markdown("---")
+
+    # ══════════════════════════════════════════════════════════════
+    # SECTION: API CONFIG
+    # ══════════════════════════════════════════════════════════════
+    if section == "🔑  API CONFIG":
+
+        (st.info if CRYPTO_AVAILABLE else st.warning)(_KEY_HINT, icon="🔑")
+
+        if has_key:
+            st.markdown(f"""
+            <div style="background:#071908;border:1px solid #24a148;border-left:4px solid #24a148;
+                        padding:0.75rem 1rem;margin-bottom:1rem;
+                        font-family:'IBM Plex Mono',monospace;font-size:0.8rem;word-break:break-all">
+                ● AI ACTIVE &nbsp;·&nbsp; Key: {mask_key(cfg['api_key'])}
+                &nbsp;·&nbsp; Model: {cfg.get('model','—')}
+            </div>
+            """, unsafe_allow_html=True)
+
+        with st.form("ai_config_form"):
+            st.markdown('<div class="mono-label">API KEY</div>', unsafe_allow_html=True)
+            api_key = st.text_input(
+                "API Key", type="password",
+                placeholder="sk-... (blank = keep existing)" if has_key else "sk-xxxxxxxxxxxxxxxxxxxx",
+                label_visibility="collapsed",
+                autocomplete="off",
+            )
+
+            st.markdown('<div class="mono-label" style="margin-top:12px">MODEL</div>', unsafe_allow_html=True)
+            model = st.selectbox(
+                "Model",
+                ["deepseek-chat", "deepseek-coder"],
+                index=0 if not cfg else ["deepseek-chat","deepseek-coder"].index(
+                    cfg.get("model", "deepseek-chat")),
+                label_visibility="collapsed",
+            )
+
+            st.markdown('<div class="mono-label" style="margin-top:12px">BASE URL</div>', unsafe_allow_html=True)
+            base_url = st.text_input(
+                "Base URL",
+                value=cfg.get("base_url", DEEPSEEK_URL) if cfg else DEEPSEEK_URL,
+                label_visibility="collapsed",
+            )
+
+            st.markdown('<div class="mono-label" style="margin-top:12px">MONTHLY BUDGET (USD)</div>',
+                        unsafe_allow_html=True)
+            new_budget = st.number_input(
+                "Budget", 1.0, 10000.0, float(budget), step=5.0,
+                label_visibility="collapsed",
+            )
+            st.progress(
+                budget_pct / 100,
+                text=f"${monthly_cost:.4f} of ${budget:.2f} used ({budget_pct:.1f}%)",
+            )
+
+            st.markdown('<div class="mono-label" style="margin-top:12px">ENABLED FEATURES</div>',
+                        unsafe_allow_html=True)
+            # One multiselect rather than a checkbox per feature; saved in canonical order.
+            current  = cfg["features"] if cfg else list(_FEATURE_LABELS)
+            chosen   = st.multiselect("Features", list(_FEATURE_LABELS),
+                                      default=[k for k in _FEATURE_LABELS if k in current],
+                                      format_func=_FEATURE_LABELS.__getitem__,
+                                      key="feat_select", label_visibility="collapsed")
+            features = [k for k in _FEATURE_LABELS if k in chosen]
+
+            st.markdown("")
+            if st.form_submit_button("SAVE CONFIGURATION", use_container_width=True):
+                key_to_save = (api_key.strip() if api_key and api_key.strip()
+                               else (cfg["api_key"] if cfg else ""))
+                if not key_to_save:
+                    st.error("API key is required.")
+                elif not features:
+                    st.error("Enable at least one feature.")
+                else:
+                    save_ai_config("deepseek", key_to_save, model, base_url, new_budget, features)
+                    st.success("✅  Configuration saved.")
+                    st.rerun()
+
+        st.markdown("---")
+        st.markdown('<div class="mono-label">TEST CONNECTION</div>', unsafe_allow_html=True)
+        test_key = st.text_input(
+            "Paste key to test", type="password", key="test_key_input",
+            placeholder="sk-...", label_visibility="collapsed",
+        )
+        if st.button("▶  TEST CONNECTION", use_container_width=True):
+            if not test_key:
+                st.warning("Paste a key above first.")
+            else:
+                with st.spinner("Connecting..."):
+                    ok, msg = test_api_key(
+                        test_key.strip(),
+                        cfg.get("base_url", DEEPSEEK_URL) if cfg else DEEPSEEK_URL,
+                    )
+                (st.success if ok else st.error)(msg)
+
+    # ══════════════════════════════════════════════════════════════
+    # SECTION: USAGE ANALYTICS
+    # ══════════════════════════════════════════════════════════════
+    elif section == "📊  USAGE":
+        totals = db_one("SELECT COUNT(*) AS n, COALESCE(SUM(CASE WHEN success=1 THEN cost_usd END),0) AS cost, "
+                        f"AVG(success)*100 AS rate FROM {_RECENT_USAGE}")
+        if not totals["n"]:
+            st.info("No AI usage yet. Run an analysis from ⬡ AI ASSISTANT.")
+        else:
+            total_cost, total_calls, success_rate = totals["cost"], totals["n"], totals["rate"]
+
+            c1, c2, c3 = st.columns(3)
+            c1.metric("TOTAL COST",   f"${total_cost:.4f}")
+            c2.metric("TOTAL CALLS",  total_calls)
+            c3.metric("SUCCESS RATE", f"{success_rate:.1f}%")
+            st.markdown("")
+
+            by_feat = tuple(map(tuple, db_rows_raw(
+                f"SELECT feature, SUM(cost_usd) AS cost_usd FROM {_RECENT_USAGE} WHERE success=1 "
+                "GROUP BY feature ORDER BY feature")))
+            if by_feat:
+                st.plotly_chart(_feature_cost_fig(by_feat), use_container_width=True)
+
+            daily = tuple(map(tuple, db_rows_raw(
+                f"SELECT date(created_at) AS created_at, SUM(cost_usd) AS cost_usd FROM {_RECENT_USAGE} "
+                "WHERE success=1 GROUP BY 1 ORDER BY 1")))
+            if daily:
+                st.plotly_chart(_daily_cost_fig(daily), use_container_width=True)
+
+            df_display = pd.DataFrame.from_records(db_rows_raw(
+                "SELECT created_at, feature, cost_usd, success FROM ai_usage_log ORDER BY created_at DESC LIMIT 30"),
+                columns=["created_at","feature","cost_usd","success"])
+            df_display = df_display.assign(created_at=pd.to_datetime(df_display["created_at"]),
+                                           success=df_display["success"].astype(bool))
+            # Cost and OK stay numeric/bool and are formatted client-side, so they sort.
+            st.dataframe(df_display, use_container_width=True, hide_index=True, column_config={
+                "created_at": "When", "feature": "Feature",
+                "cost_usd": st.column_config.NumberColumn("Cost", format="$%.6f"),
+                "success":  st.column_config.CheckboxColumn("OK")})
+
+    # ══════════════════════════════════════════════════════════════
+    # SECTION: DATA MANAGEMENT
+    # ══════════════════════════════════════════════════════════════
+    else:
+        pid       = project["id"]
+        bundle    = load_project_bundle(pid, data_version(pid))
+        team_d    = bundle.team
+        sprints_d = bundle.sprints
+        risks_d   = bundle.risks
+        entries_d = bundle.entries
+
+        st.markdown('<div class="mono-label">EXPORT DATA</div>', unsafe_allow_html=True)
+        st.markdown("")
+
+        # (label, bundle attr, file) — bytes come from the version-keyed cache.
+        for label, table, fname in (("TEAM", "team", "team"), ("SPRINTS", "sprints", "sprints"),
+                                    ("RISKS", "risks", "risks"), ("BUDGET", "entries", "budget")):
+            if getattr(bundle, table):
+                st.download_button(f"↓  {label} CSV", project_csv(pid, data_version(pid), table),
+                                   f"{fname}.csv", "text/csv", use_container_width=True)
+        if not any([team_d, sprints_d, risks_d, entries_d]):
+            st.info("No data to export yet.")
+
+        st.markdown("---")
+        st.markdown('<div class="mono-label" style="color:#da1e28">DANGER ZONE</div>',
+                    unsafe_allow_html=True)
+        with st.expander("⚠  DELETE PROJECT"):
+            st.error(
+                f"Permanently deletes ALL data for **{project['name']}** "
+                "including team, sprints, risks and budget. Cannot be undone."
+            )
+            confirm = st.text_input("Type project name to confirm:", key="delete_confirm")
+            if st.button("DELETE PROJECT", use_container_width=True):
+                if confirm == project["name"]:
+                    db_exec("DELETE FROM projects WHERE id=?", (pid,))
+                    bump_data_version(pid)
+                    st.success("Deleted. Reloading...")
+                    st.rerun()
+                else:
+                    st.error("Name doesn't match — try again.")
+
+    # ── Render timings per page — ?debug=1 only ──
+    if st.query_params.get("debug") == "1":
+        st.markdown("---")
+        with st.expander("⏱  PAGE RENDER TIMINGS (this process)"):
+            timings = page_timings()
+            if timings:
+                st.dataframe(pd.DataFrame(timings).sort_values("total_ms", ascending=False),
+                             hide_index=True, use_container_width=True)
+            else:
+                st.info("No page renders recorded yet.")
+        with st.expander("🗄  CACHE HIT RATIOS (this process)"):
+            stats = cache_hit_stats()
+            busted = [r["cache"] for r in stats if r["calls"] >= 20 and r["hit_ratio"] < 0.5]
+            if busted:
+                st.warning(f"Low hit ratio after warm-up: {', '.join(busted)}")
+            if stats:
+                st.dataframe(pd.DataFrame(stats), hide_index=True, use_container_width=True)
+            else:
+                st.info("No cache reads recorded yet.")
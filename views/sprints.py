@@ -0,0 +1,188 @@
+"""Sprint board page: overview, planning, retros and forecast."""
+import math
+from datetime import date, timedelta
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from core import (ai_gate, bump_data_version, data_version, db_exec, db_exec_logged,
+    load_project_bundle, new_id, plotly_theme, project_aggregates, project_csv, section_header,
+    shrink_df, stream_ai_result)
+
+# ═════════════════════════════════════════════════════════════════════════════
+# PAGE: SPRINT BOARD
+# ═════════════════════════════════════════════════════════════════════════════
+# Overview swimlanes: (status, label, card accent). The None lane collects any
+# status outside the three the forms offer, so no sprint goes unshown.
+_SPRINT_LANES = (("completed","✓ COMPLETED","#24a148"), ("active","► ACTIVE","#0f62fe"),
+                 ("planned","◇ PLANNED","#525252"), (None,"· OTHER","#525252"))
+
+# Chart figures per (project, data version); see the chart-figures note in core.py.
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _velocity_fig(pid, version):
+    sprints = load_project_bundle(pid, version).sprints
+    df_v = shrink_df(pd.DataFrame({"S":[f"S{s['number']}" for s in sprints],"Planned":[s["planned_points"] for s in sprints],"Completed":[s["completed_points"] for s in sprints]}))
+    fig = px.bar(df_v, x="S", y=["Planned","Completed"], barmode="overlay",
+                 color_discrete_map={"Planned":"#393939","Completed":"#0f62fe"},
+                 title="VELOCITY HISTORY")
+    fig.update_layout(**plotly_theme())
+    return fig
+
+# Each tab body is a fragment: widgets inside one tab rerun only that tab.
+@st.fragment
+def _sprints_overview_tab(pid, sprints):
+    if not sprints:
+        st.info("No sprints. Create one in PLANNING.")
+    else:
+        # Status swimlanes
+        status_groups = {status: [] for status, _, _ in _SPRINT_LANES}
+        other = status_groups[None]
+        for s in sprints:
+            status_groups.get(s["status"], other).append(s)
+
+        for status, label, border_color in _SPRINT_LANES:
+            group = status_groups[status]
+            if not group: continue
+            st.markdown(f'<div class="mono-label" style="margin-top:1rem">{label}</div>', unsafe_allow_html=True)
+            cols = st.columns(min(len(group),3))
+            for i,s in enumerate(group):
+                with cols[i%3]:
+                    pct = s["completion_pct"]
+                    st.markdown(f"""
+                    <div style="background:#262626;border:1px solid #393939;border-top:3px solid {border_color};padding:1rem;margin-bottom:0.5rem">
+                        <div class="mono-label">SPRINT {s['number']}</div>
+                        <div style="font-size:0.9rem;color:#f4f4f4;margin:4px 0">{s.get('goal','—')}</div>
+                        <div style="margin:8px 0">
+                            <div style="background:#393939;height:4px">
+                                <div style="background:{border_color};height:4px;width:{pct}%"></div>
+                            </div>
+                        </div>
+                        <span style="font-family:'IBM Plex Mono',monospace;font-size:0.78rem;color:#a8a8a8">
+                            {s['completed_points']}/{s['planned_points']} pts · {pct:.0f}%
+                        </span>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+        # Velocity chart
+        st.markdown("---")
+        st.plotly_chart(_velocity_fig(pid, data_version(pid)), use_container_width=True)
+
+        # Export
+        csv = project_csv(pid, data_version(pid), "sprints")
+        st.download_button("↓ EXPORT SPRINTS CSV", csv, "sprints.csv", "text/csv")
+
+@st.fragment
+def _sprints_planning_tab(pid, sprints):
+    st.markdown('<div class="mono-label">CREATE SPRINT</div>', unsafe_allow_html=True)
+    next_num = (max(s["number"] for s in sprints)+1) if sprints else 1
+    with st.form("sprint_form"):
+        c1,c2 = st.columns(2)
+        goal = st.text_input("Sprint Goal *", placeholder="e.g. Complete checkout flow integration")
+        c1,c2,c3 = st.columns(3)
+        start = c1.date_input("Start Date", value=date.today())
+        end   = c2.date_input("End Date",   value=date.today()+timedelta(days=13))
+        pts   = c3.number_input("Planned Points", 1, 500, 45)
+        status = st.selectbox("Status", ["planned","active","completed"])
+        if st.form_submit_button(f"CREATE SPRINT {next_num}"):
+            if not goal.strip():
+                st.error("Sprint goal required.")
+            else:
+                db_exec_logged("INSERT INTO sprints (id,project_id,number,goal,start_date,end_date,planned_points,status) VALUES (?,?,?,?,?,?,?,?)",
+                        (new_id(),pid,next_num,goal.strip(),str(start),str(end),pts,status),
+                        pid,"sprint_created",f"Sprint {next_num}: {goal}")
+                st.success(f"Sprint {next_num} created!"); st.rerun()
+
+    if sprints:
+        st.markdown("---")
+        st.markdown('<div class="mono-label">UPDATE SPRINT</div>', unsafe_allow_html=True)
+        sprint_names = [f"Sprint {s['number']}: {s.get('goal','')[:40]}" for s in sprints]
+        sel_idx = st.selectbox("Select sprint to update", range(len(sprint_names)),
+                               format_func=lambda i: sprint_names[i])
+        sel_sprint = sprints[sel_idx]
+        with st.form("update_sprint_form"):
+            c1,c2 = st.columns(2)
+            new_completed = c1.number_input("Completed Points", 0, 500, sel_sprint["completed_points"])
+            new_status = c2.selectbox("Status", ["planned","active","completed"],
+                                      index=["planned","active","completed"].index(sel_sprint["status"]))
+            new_blockers_raw = st.text_area("Blockers (one per line)", "\n".join(sel_sprint["blockers"]))
+            if st.form_submit_button("UPDATE SPRINT"):
+                new_blockers = [b.strip() for b in new_blockers_raw.split("\n") if b.strip()]
+                db_exec_logged("UPDATE sprints SET completed_points=?,status=?,blockers=? WHERE id=?",
+                        (new_completed,new_status,new_blockers,sel_sprint["id"]),
+                        pid,"sprint_updated",f"Sprint {sel_sprint['number']}: {new_completed}pts, {new_status}")
+                st.success("Sprint updated!"); st.rerun()
+
+@st.fragment
+def _sprints_retro_tab(project, pid, sprints):
+    completed = [s for s in sprints if s["status"]=="completed"]
+    if not completed:
+        st.info("No completed sprints yet.")
+    else:
+        # Index options: the choice maps straight back to its sprint, no label parsing or scan.
+        retro_labels = [f"Sprint {s['number']}: {s.get('goal','')}" for s in completed]
+        sprint = completed[st.selectbox("Select sprint for retrospective", range(len(completed)),
+                                        format_func=retro_labels.__getitem__)]
+        existing = sprint.get("retro_notes",{})
+
+        with st.form("retro_form"):
+            went_well  = st.text_area("✓ WENT WELL",    value=existing.get("went_well",""),  height=100)
+            improve    = st.text_area("△ TO IMPROVE",   value=existing.get("improve",""),    height=100)
+            action     = st.text_area("▶ ACTION ITEMS", value=existing.get("actions",""),    height=100)
+            if st.form_submit_button("SAVE RETROSPECTIVE"):
+                notes = {"went_well":went_well,"improve":improve,"actions":action}
+                db_exec("UPDATE sprints SET retro_notes=? WHERE id=?", (notes,sprint["id"]))
+                bump_data_version(pid)
+                st.success("Retrospective saved!"); st.rerun()
+
+        st.markdown("---")
+        if ai_gate("SPRINT RETROSPECTIVE AI"):
+            if st.button("AI RETROSPECTIVE SUMMARY"):
+                prompt = (f"Summarise retrospective for Sprint {sprint['number']} of '{project['name']}'.\n"
+                          f"Velocity: {sprint['completed_points']}/{sprint['planned_points']} pts.\n"
+                          f"Went well: {existing.get('went_well','none')}\n"
+                          f"To improve: {existing.get('improve','none')}\n"
+                          f"Actions: {existing.get('actions','none')}\n"
+                          "Generate: executive summary, key patterns, prioritised action recommendations.")
+                stream_ai_result("AI RETROSPECTIVE SUMMARY", prompt, "retro", {"sprint":sprint["number"],"project":project["name"]})
+
+@st.fragment
+def _sprints_forecast_tab(project, pid):
+    if not ai_gate("SPRINT AI FORECAST"):
+        pass
+    else:
+        # Velocities and their mean come from the per-version aggregates, which
+        # are recomputed only when a sprint write bumps the data version.
+        agg = project_aggregates(pid, data_version(pid))
+        remaining = project.get("total_points",0)-project.get("completed_points",0)
+        velocities = agg.velocities or [30]
+        avg_v = agg.avg_velocity
+        sprints_left = math.ceil(remaining/avg_v) if avg_v else "unknown"
+
+        col1,col2,col3 = st.columns(3)
+        col1.metric("REMAINING POINTS", f"{remaining}")
+        col2.metric("AVG VELOCITY", f"{avg_v:.1f} pts")
+        col3.metric("EST. SPRINTS LEFT", str(sprints_left))
+
+        scenario = st.selectbox("Scenario", ["Current pace","Add 1 senior dev","Reduce scope 20%","Add 1 dev + reduce scope 10%"])
+        if st.button("GENERATE FORECAST"):
+            prompt = (f"Sprint delivery forecast for '{project['name']}'.\n"
+                      f"Remaining: {remaining} points. Avg velocity: {avg_v:.1f} pts/sprint.\n"
+                      f"Past velocities: {velocities}\nScenario: {scenario}\n"
+                      f"Sprint length: 2 weeks. Budget remaining: ${project['budget']-agg.total_expense:,.0f}\n"
+                      "Give: 1) Delivery date range with 80% confidence interval  "
+                      "2) Probability of meeting original deadline  "
+                      "3) Recommended sprint capacity for next sprint  "
+                      "4) Risk factors affecting forecast")
+            stream_ai_result(f"DELIVERY FORECAST — {scenario.upper()}", prompt, "forecast")
+
+def page_sprints(project, projects):
+    pid = project["id"]
+    sprints = load_project_bundle(pid, data_version(pid)).sprints
+    section_header("SPRINT BOARD", f"{project['name']}")
+
+    tabs = st.tabs(["OVERVIEW","PLANNING","🔄 RETRO","📅 FORECAST"])
+    with tabs[0]: _sprints_overview_tab(pid, sprints)
+    with tabs[1]: _sprints_planning_tab(pid, sprints)
+    with tabs[2]: _sprints_retro_tab(project, pid, sprints)
+    with tabs[3]: _sprints_forecast_tab(project, pid)
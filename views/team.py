@@ -0,0 +1,160 @@
+"""Team page: roster, workload chart, member editing and AI health check."""
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from core import (ai_gate, data_version, db_exec_logged, df_to_csv, load_project_bundle, new_id,
+    plotly_theme, project_aggregates, section_header, shrink_df, stream_ai_result, tag)
+
+# ═════════════════════════════════════════════════════════════════════════════
+# PAGE: TEAM
+# ═════════════════════════════════════════════════════════════════════════════
+# Roster CSV (skills left out), serialized once per data version.
+@st.cache_data(ttl=60, show_spinner=False)
+def _team_csv(pid, version):
+    team = load_project_bundle(pid, version).team
+    return df_to_csv(pd.DataFrame([{k:v for k,v in m.items() if k!="skills"} for m in team]))
+
+# Roster markup, rendered once per data version and shared by every rerun.
+@st.cache_data(ttl=60, show_spinner=False)
+def _roster_html(pid, version):
+    cards = []
+    for m in load_project_bundle(pid, version).team:
+        wc = "green" if m["workload"]<70 else "yellow" if m["workload"]<85 else "red"
+        mc = "green" if m["morale"]>70  else "yellow" if m["morale"]>50  else "red"
+        skills_html = " ".join(tag(s,"blue") for s in m["skills"][:5])
+        cards.append(f"""
+        <div style="background:#262626;border:1px solid #393939;padding:1rem 1.25rem;margin-bottom:0.5rem;display:flex;justify-content:space-between;align-items:center">
+            <div style="flex:2">
+                <span style="font-family:'IBM Plex Mono',monospace;font-weight:600;color:#f4f4f4">{m['name']}</span>
+                <span style="font-family:'IBM Plex Mono',monospace;font-size:0.78rem;color:#a8a8a8;margin-left:12px">{m['role']}</span><br>
+                <span style="font-size:0.75rem;color:#a8a8a8">{m.get('email','')}</span>
+            </div>
+            <div style="flex:2;text-align:center">{skills_html}</div>
+            <div style="flex:1;text-align:center">
+                {tag(f"WL {m['workload']:.0f}%", wc)}
+                {tag(f"MO {m['morale']:.0f}", mc)}
+            </div>
+            <div style="font-family:'IBM Plex Mono',monospace;font-size:0.82rem;color:#a8a8a8;flex:1;text-align:right">
+                ${m.get('daily_rate',0):,.0f}/day
+            </div>
+        </div>
+        """)
+    return "".join(cards)
+
+@st.fragment
+def _team_roster_tab(pid, version):
+    roster = _roster_html(pid, version)
+    if roster: st.markdown(roster, unsafe_allow_html=True)
+    st.download_button("↓ EXPORT TEAM CSV", _team_csv(pid, version), "team.csv", "text/csv")
+
+# Chart figures per (project, data version); see the chart-figures note in core.py.
+@st.cache_resource(show_spinner=False, max_entries=32)
+def _team_fig(pid, version):
+    team = load_project_bundle(pid, version).team
+    df_t = shrink_df(pd.DataFrame({"Name":[m["name"].split()[0] for m in team],"Workload":[m["workload"] for m in team],"Morale":[m["morale"] for m in team]}))
+    fig = px.bar(df_t,x="Name",y=["Workload","Morale"],barmode="group",
+                 color_discrete_map={"Workload":"#ff832b","Morale":"#42be65"},
+                 title="TEAM WORKLOAD & MORALE")
+    fig.add_hline(y=85,line_color="#da1e28",line_dash="dash",
+                  annotation_text="OVERLOAD THRESHOLD",annotation_font_color="#da1e28",
+                  annotation_font_size=9,annotation_font_family="IBM Plex Mono")
+    fig.update_layout(**plotly_theme())
+    return fig
+
+@st.fragment
+def _team_chart_tab(pid, version):
+    st.plotly_chart(_team_fig(pid, version),use_container_width=True)
+
+@st.fragment
+def _team_edit_tab(pid, team_by_name):
+    sel_name = st.selectbox("Select member", list(team_by_name))
+    sel_m = team_by_name[sel_name]
+    with st.form("edit_member_form"):
+        c1,c2 = st.columns(2)
+        new_role  = c1.text_input("Role",  value=sel_m["role"])
+        new_email = c2.text_input("Email", value=sel_m.get("email",""))
+        new_skills_raw = st.text_input("Skills (comma-separated)", value=", ".join(sel_m["skills"]))
+        c3,c4,c5 = st.columns(3)
+        new_wl   = c3.slider("Workload %", 0, 100, int(sel_m["workload"]))
+        new_mo   = c4.slider("Morale",     0, 100, int(sel_m["morale"]))
+        new_rate = c5.number_input("Daily Rate ($)", 0.0, 10000.0, float(sel_m.get("daily_rate",0)))
+        col_save,col_del = st.columns(2)
+        save = col_save.form_submit_button("SAVE CHANGES")
+        delete = col_del.form_submit_button("DELETE MEMBER")
+        if save:
+            new_skills = [s.strip() for s in new_skills_raw.split(",") if s.strip()]
+            db_exec_logged("UPDATE team_members SET role=?,email=?,skills=?,workload=?,morale=?,daily_rate=? WHERE id=?",
+                    (new_role,new_email,new_skills,new_wl,new_mo,new_rate,sel_m["id"]),
+                    pid,"member_updated",f"{sel_name}: workload={new_wl}%, morale={new_mo}")
+            st.success("Member updated!"); st.rerun()
+        if delete:
+            db_exec_logged("DELETE FROM team_members WHERE id=?", (sel_m["id"],), pid,"member_removed",sel_name)
+            st.warning(f"{sel_name} removed from team."); st.rerun()
+
+@st.fragment
+def _team_ai_tab(project, team, avg_morale, avg_workload, overloaded, low_morale_n):
+    if ai_gate("TEAM AI INSIGHTS"):
+        if st.button("AI TEAM HEALTH ANALYSIS"):
+            team_summary = [{"name":m["name"],"role":m["role"],"workload":m["workload"],"morale":m["morale"]} for m in team]
+            prompt = (f"Team health analysis for '{project['name']}'.\n"
+                      f"Avg morale: {avg_morale:.1f}, Avg workload: {avg_workload:.1f}%, "
+                      f"Overloaded: {overloaded}, Low morale: {low_morale_n}\n"
+                      "Team:\n" + "\n".join(f"- {m['name']} ({m['role']}): WL={m['workload']:.0f}% MO={m['morale']:.0f}" for m in team)
+                      + "\nGive: 1) Individual members at risk  2) Team dynamic concerns  "
+                      "3) Workload redistribution recommendation  4) Morale improvement actions")
+            stream_ai_result("TEAM HEALTH ANALYSIS", prompt, "therapy", {"team":team_summary})
+
+def page_team(project, projects):
+    pid = project["id"]
+    version = data_version(pid)
+    # Team averages and counts come from the single team pass in project_aggregates.
+    agg = project_aggregates(pid, version)
+    team = agg.team
+    team_by_name = {m["name"]: m for m in team}
+    section_header("TEAM MANAGEMENT", f"{project['name']}")
+
+    if team:
+        avg_morale, avg_workload = agg.avg_morale, agg.avg_workload
+        overloaded, low_morale_n = agg.overloaded, agg.low_morale
+        total_daily = agg.total_daily
+
+        c1,c2,c3 = st.columns(3)
+        c1.metric("HEADCOUNT",    len(team))
+        c2.metric("AVG MORALE",   f"{avg_morale:.0f}/100",  f"{'↑ Good' if avg_morale>70 else '↓ Risk'}")
+        c3.metric("AVG WORKLOAD", f"{avg_workload:.0f}%",   delta_color="inverse" if avg_workload>85 else "normal")
+        c4,c5 = st.columns(2)
+        c4.metric("AT RISK",      overloaded+low_morale_n,  f"{overloaded} overloaded · {low_morale_n} morale")
+        c5.metric("DAILY COST",   f"${total_daily:,.0f}")
+
+        tabs = st.tabs(["ROSTER","📊 CHART","✏️ EDIT","🤖 AI"])
+        with tabs[0]: _team_roster_tab(pid, version)
+        with tabs[1]: _team_chart_tab(pid, version)
+        with tabs[2]: _team_edit_tab(pid, team_by_name)
+        with tabs[3]: _team_ai_tab(project, team, avg_morale, avg_workload, overloaded, low_morale_n)
+    else:
+        st.info("No team members. Add one below.")
+
+    st.markdown("---")
+    with st.expander("➕ ADD TEAM MEMBER"):
+        with st.form("add_member_form"):
+            c1,c2 = st.columns(2)
+            name  = c1.text_input("Full Name *")
+            role  = c2.text_input("Role")
+            c3,c4 = st.columns(2)
+            email = c3.text_input("Email")
+            rate  = c4.number_input("Daily Rate ($)", 0.0, 10000.0, 600.0)
+            skills_raw = st.text_input("Skills (comma-separated)", placeholder="Python, AWS, Docker")
+            c5,c6 = st.columns(2)
+            wl = c5.slider("Initial Workload %", 0, 100, 70)
+            mo = c6.slider("Initial Morale",     0, 100, 80)
+            if st.form_submit_button("ADD MEMBER"):
+                if not name.strip():
+                    st.error("Name required.")
+                else:
+                    skills = [s.strip() for s in skills_raw.split(",") if s.strip()]
+                    db_exec_logged("INSERT INTO team_members (id,project_id,name,role,email,skills,workload,morale,daily_rate) VALUES (?,?,?,?,?,?,?,?,?)",
+                            (new_id(),pid,name.strip(),role,email,skills,wl,mo,rate),
+                            pid,"member_added",name.strip())
+                    st.success(f"{name} added!"); st.rerun()